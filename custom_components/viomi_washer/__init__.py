@@ -1,6 +1,7 @@
 """The Xiaomi/Viomi Washing Machine component."""
 # pylint: disable=import-error
 import logging
+from functools import partial
 
 import homeassistant.helpers.config_validation as cv
 from homeassistant.const import (
@@ -9,40 +10,78 @@ from homeassistant.const import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.exceptions import PlatformNotReady
-from miio import (  # pylint: disable=import-error
-    Device,
-    DeviceException
-)
+from miio import DeviceException  # pylint: disable=import-error
 
 from .const import (
     CONF_MODEL,
     DATA_KEY,
     DOMAIN,
     DOMAINS,
-    MODELS_MIIO
+    LIVE_OPTIONS,
+    MODELS_MIIO,
+    STORAGE_KEY,
+    STORAGE_KEY_HISTORY,
+    STORAGE_VERSION
 )
+from .cloud import async_recover_token
+from .executor import async_get_executor, async_shutdown_executor
+from .protocol import MiioDevice
+from .services import async_setup_services
+from .washer import ViomiWasher, async_get_washer
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup(hass: HomeAssistant, hass_config: dict):
     """Set up the Xiaomi/Viomi Washing Machine Component."""
+    async_setup_services(hass)
 
     return True
 
 
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry):
     """ Update Optioins if available """
-    await hass.config_entries.async_reload(entry.entry_id)
+    washer = async_get_washer(hass, entry.entry_id)
+    options = entry.options
+    changed = {
+        key for key in set(options) | set(washer.options if washer else {})
+        if washer is None or options.get(key) != washer.options.get(key)
+    }
+    if washer is None or changed - LIVE_OPTIONS:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    old_host = washer.device.ip
+    washer.options = dict(options)
+    host = options[CONF_HOST]
+    if host != old_host:
+        hass.data[DOMAIN][host] = hass.data[DOMAIN].pop(old_host)
+        hass.data[DATA_KEY][host] = hass.data[DATA_KEY].pop(old_host, {})
+    await washer.async_reconfigure(host, options[CONF_TOKEN])
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """ check unload integration """
-    return all([
+    unloaded = all([
         await hass.config_entries.async_forward_entry_unload(entry, domain)
         for domain in DOMAINS
     ])
+    washer = async_get_washer(hass, entry.entry_id)
+    if unloaded and washer is not None:
+        washer.async_shutdown()
+        await washer.async_save()
+        hass.data[DOMAIN].pop(washer.device.ip, None)
+    if unloaded and not hass.data.get(DOMAIN):
+        async_shutdown_executor(hass)
+    return unloaded
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """ remove the saved snapshot and cycle history of a deleted entry """
+    for key in (STORAGE_KEY, STORAGE_KEY_HISTORY):
+        await Store(hass, STORAGE_VERSION, key.format(entry.entry_id)).async_remove()
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
@@ -66,17 +105,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         token = entry.options[CONF_TOKEN]
         model = entry.options.get(CONF_MODEL)
 
-    if DATA_KEY not in hass.data:
-        hass.data.setdefault(DATA_KEY, {})
-        hass.data[DATA_KEY][host] = {}
+    hass.data.setdefault(DATA_KEY, {})
+    hass.data[DATA_KEY].setdefault(host, {})
 
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {}
 
     if model is None:
         try:
-            miio_device = Device(host, token)
-            device_info = await hass.async_add_executor_job(miio_device.info)
+            miio_device = MiioDevice(host, token)
+            device_info = await async_get_executor(hass).async_run(miio_device.info)
             model = device_info.model
             _LOGGER.info(
                 "%s %s %s detected",
@@ -88,7 +126,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             raise PlatformNotReady from ex
 
     if model in MODELS_MIIO:
-        washer = Device(host, token)
+        washer = ViomiWasher(hass, MiioDevice(host, token), entry)
     else:
         _LOGGER.error(
             "Unsupported device found! Please create an issue at "
@@ -98,7 +136,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         )
         return False
 
+    washer.token_recovery = partial(async_recover_token, hass, entry, washer)
+
+    # Entities start from the saved snapshot, the probe reaches the device later
+    await washer.async_restore()
+    if washer.device_info is None:
+        try:
+            await washer.async_fetch_info()
+        except DeviceException as ex:
+            _LOGGER.debug("Unable to read the info of %s: %s", host, ex)
+
     hass.data[DOMAIN][host] = washer
+    washer.async_start_probe()
 
     # init setup for each supported domains
     await hass.config_entries.async_forward_entry_setups(entry, DOMAINS)
@@ -0,0 +1,107 @@
+"""Mi Cloud token recovery of the Xiaomi/Viomi Washing Machine component."""
+import json
+import logging
+
+from micloud import MiCloud
+from micloud.micloudexception import MiCloudAccessDenied, MiCloudException
+from miio import DeviceException
+
+from homeassistant.const import CONF_MAC, CONF_TOKEN
+from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.device_registry import format_mac
+
+from homeassistant.components.xiaomi_miio.const import (
+    CONF_CLOUD_COUNTRY,
+    CONF_CLOUD_PASSWORD,
+    CONF_CLOUD_USERNAME
+)
+
+from .const import DATA_CLOUD
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CloudTokenFetcher:
+    """Look up the token of one device with a logged in Mi Cloud session."""
+
+    def __init__(self, username, password, country, cloud_factory=None):
+        self.country = country
+        # Looked up on use so the cloud client can be patched
+        self._cloud = (cloud_factory or MiCloud)(username, password)
+        self._logged_in = False
+
+    def _login(self):
+        try:
+            self._logged_in = bool(self._cloud.login())
+        except MiCloudAccessDenied:
+            self._logged_in = False
+        return self._logged_in
+
+    def _request_devices(self, did):
+        params = {"data": json.dumps(
+            {"getVirtualModel": False, "getHuamiDevices": 0, "dids": [str(did)]})}
+        response = self._cloud.request_country("/home/device_list", self.country, params)
+        return json.loads(response)["result"]["list"]
+
+    def get_token(self, did, mac):
+        """Return the current token of the device, or None."""
+        if not self._logged_in and not self._login():
+            return None
+        try:
+            devices = self._request_devices(did)
+        except (MiCloudException, KeyError, ValueError):
+            # The cached session may have expired, log in again once
+            if not self._login():
+                return None
+            devices = self._request_devices(did)
+
+        for device in devices:
+            if str(device.get("did")) == str(did) or (
+                    mac and format_mac(device.get("mac") or "") == format_mac(mac)):
+                return device.get("token")
+        return None
+
+
+def async_get_fetcher(hass: HomeAssistant, options, cloud_factory=None):
+    """Return the cached fetcher of the cloud account in the options."""
+    username = options.get(CONF_CLOUD_USERNAME)
+    password = options.get(CONF_CLOUD_PASSWORD)
+    country = options.get(CONF_CLOUD_COUNTRY)
+    if not username or not password or not country:
+        return None
+
+    fetchers = hass.data.setdefault(DATA_CLOUD, {})
+    key = (username, password, country)
+    if key not in fetchers:
+        fetchers[key] = CloudTokenFetcher(username, password, country, cloud_factory)
+    return fetchers[key]
+
+
+async def async_recover_token(hass: HomeAssistant, entry: ConfigEntry, washer):
+    """Fetch the new token of a re-paired washer and apply it in place."""
+    fetcher = async_get_fetcher(hass, entry.options)
+    did = washer.device.device_id
+    if fetcher is None or did is None:
+        _LOGGER.warning(
+            "Token of %s seems to have changed, please update it in the options",
+            washer.device.ip)
+        return False
+
+    token = await hass.async_add_executor_job(
+        fetcher.get_token, did, entry.options.get(CONF_MAC))
+    if not token or token == washer.device.token:
+        _LOGGER.debug("No new token for %s in the cloud", washer.device.ip)
+        return False
+
+    _LOGGER.info("Token of %s changed, using the one from the cloud", washer.device.ip)
+    washer.set_connection(washer.device.ip, token)
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.options, CONF_TOKEN: token})
+    try:
+        # Not through async_update, a read in flight still uses the old token
+        await washer.async_run(washer.update)
+    except DeviceException as ex:
+        _LOGGER.debug("Error on update of %s: %s", washer.device.ip, ex)
+    washer.async_notify()
+    return True
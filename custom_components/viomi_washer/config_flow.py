@@ -1,9 +1,13 @@
 """Config flow to configure Xiaomi/Viomi Washing Machine component."""
+import asyncio
+import ipaddress
 import logging
+from functools import partial
 from re import search
 
 from micloud import MiCloud
 from micloud.micloudexception import MiCloudAccessDenied
+from miio import DeviceException
 import voluptuous as vol
 
 from homeassistant import config_entries
@@ -28,10 +32,15 @@ from homeassistant.components.xiaomi_miio.const import (
 from homeassistant.components.xiaomi_miio.device import ConnectXiaomiDevice
 
 from .const import (
+    CONF_DISCOVER,
     CONF_MODEL,
+    CONF_NETWORK,
+    DISCOVERY_MAX_HOSTS,
+    DISCOVERY_TIMEOUT,
     DOMAIN,
     MODELS_ALL_DEVICES
 )
+from .protocol import BROADCAST, MiioDevice, discover
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -48,8 +57,20 @@ DEVICE_CLOUD_CONFIG = vol.Schema(
             SERVER_COUNTRY_CODES
         ),
         vol.Optional(CONF_MANUAL, default=False): bool,
+        vol.Optional(CONF_DISCOVER, default=False): bool,
     }
 )
+DISCOVER_CONFIG = vol.Schema({vol.Optional(CONF_NETWORK, default=""): str})
+
+
+def scan_hosts(network):
+    """Return the addresses to send hello packets to, broadcast if no network."""
+    if not network:
+        return [BROADCAST]
+    network = ipaddress.ip_network(network, strict=False)
+    if network.num_addresses > DISCOVERY_MAX_HOSTS:
+        raise ValueError("Network %s is too large" % network)
+    return [str(host) for host in network.hosts()] or [str(network.network_address)]
 
 # Exceptions
 class AuthException(Exception):
@@ -140,6 +161,7 @@ class XiaomiWashingMachinelowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         self.cloud_password = None
         self.cloud_country = None
         self.cloud_devices = {}
+        self.discovered_devices = {}
 
     @staticmethod
     @callback
@@ -233,6 +255,8 @@ class XiaomiWashingMachinelowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             if user_input[CONF_MANUAL]:
                 return await self.async_step_manual()
+            if user_input.get(CONF_DISCOVER):
+                return await self.async_step_discover()
 
             cloud_username = user_input.get(CONF_CLOUD_USERNAME)
             cloud_password = user_input.get(CONF_CLOUD_PASSWORD)
@@ -313,6 +337,72 @@ class XiaomiWashingMachinelowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             step_id="select", data_schema=select_schema, errors=errors
         )
 
+    async def async_step_discover(self, user_input=None):
+        """Find washers on the local network with miIO hello packets."""
+        errors = {}
+        if user_input is not None:
+            try:
+                hosts = scan_hosts(user_input.get(CONF_NETWORK))
+            except ValueError:
+                errors["base"] = "invalid_network"
+            else:
+                found = await self.hass.async_add_executor_job(
+                    discover, hosts, DISCOVERY_TIMEOUT)
+                self.discovered_devices = await self._async_identify(found)
+                if self.discovered_devices:
+                    return await self.async_step_discovered()
+                errors["base"] = "no_devices_found"
+
+        return self.async_show_form(
+            step_id="discover", data_schema=DISCOVER_CONFIG, errors=errors
+        )
+
+    async def _async_identify(self, found):
+        """Read the model of the devices which leaked their token."""
+        configured = {
+            entry.options.get(CONF_HOST) for entry in self._async_current_entries()
+        }
+        hosts = [host for host in found if host not in configured]
+
+        async def async_info(host):
+            token = found[host][1]
+            if token is None:
+                return None
+            device = MiioDevice(host, token)
+            try:
+                return await self.hass.async_add_executor_job(
+                    partial(device.info, retry_count=0, timeout=DISCOVERY_TIMEOUT))
+            except DeviceException:
+                return None
+
+        devices = {}
+        for host, info in zip(hosts, await asyncio.gather(*map(async_info, hosts))):
+            # Paired devices keep their model to themselves until given the token
+            model = info.model if info is not None else None
+            if model is not None and model not in MODELS_ALL_DEVICES:
+                continue
+            devices[f"{host} - {model or 'unknown model'}"] = (host, found[host][1], info)
+        return devices
+
+    async def async_step_discovered(self, user_input=None):
+        """Handle the devices found on the local network."""
+        errors = {}
+        if user_input is not None:
+            self.host, self.token, info = self.discovered_devices[user_input["select_device"]]
+            if info is None:
+                return await self.async_step_manual()
+            self.model = info.model
+            self.mac = format_mac(info.mac_address)
+            return await self.async_step_connect()
+
+        select_schema = vol.Schema(
+            {vol.Required("select_device"): vol.In(list(self.discovered_devices))}
+        )
+
+        return self.async_show_form(
+            step_id="discovered", data_schema=select_schema, errors=errors
+        )
+
     async def async_step_manual(self, user_input=None):
         """Configure a xiaomi miio device Manually."""
         errors = {}
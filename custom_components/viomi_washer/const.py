@@ -8,7 +8,14 @@ from homeassistant.components.sensor import (
     SensorStateClass
 )
 
+from homeassistant.components.xiaomi_miio.const import (
+    CONF_CLOUD_COUNTRY,
+    CONF_CLOUD_PASSWORD,
+    CONF_CLOUD_USERNAME
+)
 from homeassistant.const import (
+    CONF_HOST,
+    CONF_TOKEN,
     UnitOfTime
 )
 
@@ -18,9 +25,22 @@ DOMAINS = ["fan", "sensor"]
 DATA_KEY = "viomi_washer_data"
 DATA_STATE = "state"
 DATA_DEVICE = "device"
+DATA_CLOUD = "viomi_washer_cloud"
+DATA_EXECUTOR = "viomi_washer_executor"
 
 CONF_MODEL = "model"
 CONF_MAC = "mac"
+CONF_DISCOVER = "discover"
+CONF_NETWORK = "network"
+
+# Options applied to a running washer, any other change reloads the entry
+LIVE_OPTIONS = {
+    CONF_HOST,
+    CONF_TOKEN,
+    CONF_CLOUD_USERNAME,
+    CONF_CLOUD_PASSWORD,
+    CONF_CLOUD_COUNTRY
+}
 
 MODEL_VIOMI_WASH_V5 = "viomi.washer.v5"
 
@@ -34,8 +54,55 @@ MODELS_MIIO = [
 
 MODELS_ALL_DEVICES = MODELS_MIIO
 
+APPOINT_MIN = 1  # 3 in app default
+APPOINT_MAX = 23  # 19 in app default
+DEFAULT_DRY_MODE = 30721
+DEFAULT_PARALLELISM = 4  # washers a batch command drives at the same time
+DISCOVERY_TIMEOUT = 1.0  # seconds to wait for hello replies of a LAN scan
+DISCOVERY_MAX_HOSTS = 1024  # largest network a LAN scan accepts
+DEFAULT_EXECUTOR_WORKERS = 8  # threads running the miIO requests of all washers
+DEFAULT_HEDGE_WORKERS = 2  # threads sending the duplicates of late reads
+
 DEFAULT_SCAN_INTERVAL = 60
 SCAN_INTERVAL = timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+VERIFY_DELAY = 5  # seconds before reading back the result of a command
+DEFAULT_FRESHNESS = 5  # seconds a property read is served to other entities
+TOKEN_RECOVERY_COOLDOWN = 300  # seconds between cloud token lookups of a washer
+TOKEN_ERRORS = 3  # requests in a row ignored after a fresh hello before the token is looked up
+PROBE_INTERVAL = 10  # seconds between hello packets telling if a washer is online
+PROBE_FAILURES = 2  # unanswered hello packets in a row before a washer is offline
+
+EVENT_WASHER = "viomi_washer_event"
+EVENT_CYCLE_STARTED = "cycle_started"
+EVENT_PROGRAM_CHANGED = "program_changed"
+EVENT_RINSE_STARTED = "rinse_started"
+EVENT_SPIN_STARTED = "spin_started"
+EVENT_APPOINTMENT_STARTED = "appointment_started"
+EVENT_CYCLE_FINISHED = "cycle_finished"
+EVENT_TYPES = [
+    EVENT_CYCLE_STARTED,
+    EVENT_PROGRAM_CHANGED,
+    EVENT_RINSE_STARTED,
+    EVENT_SPIN_STARTED,
+    EVENT_APPOINTMENT_STARTED,
+    EVENT_CYCLE_FINISHED
+]
+
+# wash_process of the cycle phases
+WASH_PROCESS_RINSE = 3
+WASH_PROCESS_SPIN = 4
+WASH_PROCESS_COMPLETE = 7
+
+STORAGE_VERSION = 1
+STORAGE_KEY = DOMAIN + ".{}"  # formatted with the config entry id
+STORAGE_KEY_HISTORY = DOMAIN + ".{}.history"
+HISTORY_SIZE = 500  # finished cycles kept per washer
+SAVE_DELAY = 10  # seconds a changed snapshot waits before it is written
+
+OPERATION_READ = "read"
+OPERATION_WRITE = "write"
+OPERATION_PROBE = "probe"
+HEDGE_START_ID = 5000  # message ids of hedged requests stay clear of the primary ids
 
 WASHER_PROPS = [
     "program",
@@ -75,12 +142,32 @@ WASHER_PROGS = {
     'underwears': '内衣',
 }
 
+@dataclass(frozen=True)
+class OperationPolicy:
+    """Class to describe how one kind of device operation is sent."""
+
+    timeout: float
+    retries: int
+    hedge_after: float | None = None
+
+
+OPERATION_POLICIES = {
+    # Polls fail fast and send a duplicate request if the reply is late
+    OPERATION_READ: OperationPolicy(timeout=2, retries=1, hedge_after=0.5),
+    # Commands are not idempotent, so they wait patiently instead
+    OPERATION_WRITE: OperationPolicy(timeout=5, retries=3),
+    OPERATION_PROBE: OperationPolicy(timeout=1, retries=0),
+}
+
+
 @dataclass
 class ViomiWasherSensorDescription(
     SensorEntityDescription
 ):
     """Class to describe an Xiaomi/Viomi Washing Machine sensor."""
 
+    program: str | None = None
+
 
 WASHER_SENSORS: tuple[ViomiWasherSensorDescription, ...] = (
     ViomiWasherSensorDescription(
@@ -97,3 +184,16 @@ WASHER_SENSORS: tuple[ViomiWasherSensorDescription, ...] = (
         icon="mdi:timelapse"
     )
 )
+
+WASHER_CYCLE_SENSORS: tuple[ViomiWasherSensorDescription, ...] = tuple(
+    ViomiWasherSensorDescription(
+        key="cycle_" + program,
+        name=program.replace("_", " ").capitalize() + " cycle time",
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:history",
+        entity_registry_enabled_default=False,
+        program=program
+    )
+    for program in WASHER_PROGS
+)
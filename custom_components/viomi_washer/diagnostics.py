@@ -0,0 +1,31 @@
+"""Diagnostics of the Xiaomi/Viomi Washing Machine component."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_MAC, CONF_TOKEN
+from homeassistant.core import HomeAssistant
+
+from homeassistant.components.xiaomi_miio.const import (
+    CONF_CLOUD_PASSWORD,
+    CONF_CLOUD_USERNAME
+)
+
+from .const import WASHER_PROPS
+from .washer import async_get_washer
+
+TO_REDACT = {CONF_TOKEN, CONF_MAC, CONF_CLOUD_USERNAME, CONF_CLOUD_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
+    """Return diagnostics of a config entry."""
+    washer = async_get_washer(hass, entry.entry_id)
+    diagnostics = {"options": async_redact_data(dict(entry.options), TO_REDACT)}
+    if washer is not None:
+        diagnostics.update({
+            "available": washer.available,
+            "snapshot": dict(zip(WASHER_PROPS, washer.snapshot.values)),
+            "timestamp": washer.snapshot.timestamp,
+            "stats": dict(washer.stats),
+            "executor": washer.executor.metrics(),
+            "protocol": dict(washer.device.stats),
+        })
+    return diagnostics
@@ -0,0 +1,173 @@
+"""Thread pool of the Xiaomi/Viomi Washing Machine component.
+
+The blocking miIO work of all washers runs here instead of in the shared
+executor of Home Assistant, so washers waiting on UDP timeouts only slow
+down this component. Duplicates of late reads get a few threads of their
+own, so hedging never takes a worker from the other washers.
+"""
+import asyncio
+import logging
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_EXECUTOR, DEFAULT_EXECUTOR_WORKERS, DEFAULT_HEDGE_WORKERS, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WasherExecutor:
+    """Bounded thread pool running the jobs of one key one after another.
+
+    A busy key holds a single thread while its jobs queue behind each
+    other, so a slow washer never takes more than one worker.
+    """
+
+    def __init__(self, max_workers=DEFAULT_EXECUTOR_WORKERS, max_hedges=DEFAULT_HEDGE_WORKERS):
+        self.max_workers = max_workers
+        self.max_hedges = max_hedges
+        self.stats = Counter()
+        self.queued = 0
+        self.running = 0
+        self.hedging = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="viomi_washer")
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=max_hedges, thread_name_prefix="viomi_washer_hedge")
+        self._queues = {}
+        self._hedging = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, func, *args, key=None):
+        """Schedule func, after the earlier jobs of key unless key is None."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("cannot schedule new jobs after shutdown")
+            self.queued += 1
+            self.stats['submitted'] += 1
+            self.stats['max_queued'] = max(self.stats['max_queued'], self.queued)
+            if key is not None and key in self._queues:
+                self._queues[key].append((future, func, args))
+                return future
+            if key is not None:
+                self._queues[key] = deque()
+        try:
+            job = self._executor.submit(self._run, key, future, func, args)
+        except RuntimeError:
+            # Shut down since the check above, leave no stale key behind
+            with self._lock:
+                self.queued -= 1
+                self._queues.pop(key, None)
+            raise
+        job.add_done_callback(lambda job: job.cancelled() and future.cancel())
+        return future
+
+    def _run(self, key, future, func, args):
+        """Run a job, then the jobs queued behind it for the same key."""
+        while True:
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(*args))
+                except BaseException as ex:  # pylint: disable=broad-except
+                    future.set_exception(ex)
+            with self._lock:
+                self.running -= 1
+                self.stats['completed'] += 1
+                queue = self._queues.get(key)
+                if not queue:
+                    self._queues.pop(key, None)
+                    return
+                future, func, args = queue.popleft()
+
+    def submit_hedge(self, func, *args, key=None):
+        """Start func on a hedge thread, return None if it cannot start now.
+
+        A duplicate request only helps when it goes out at once, so it is
+        dropped instead of queued: when all hedge threads are busy or key
+        already has a hedge running.
+        """
+        with self._lock:
+            if self.hedging >= self.max_hedges or key in self._hedging:
+                self.stats['hedges_dropped'] += 1
+                return None
+            self.hedging += 1
+            self.stats['hedges'] += 1
+            if key is not None:
+                self._hedging.add(key)
+        try:
+            future = self._hedge_executor.submit(func, *args)
+        except RuntimeError:
+            # Shut down
+            self._hedge_done(key, None)
+            return None
+        future.add_done_callback(partial(self._hedge_done, key))
+        return future
+
+    def _hedge_done(self, key, _future):
+        with self._lock:
+            self.hedging -= 1
+            self.stats['hedges_completed'] += 1
+            self._hedging.discard(key)
+
+    async def async_run(self, func, *args, key=None):
+        """Run func in the pool and return its result."""
+        return await asyncio.wrap_future(self.submit(func, *args, key=key))
+
+    def metrics(self):
+        """Return the queue depth and job counts."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "busy_keys": len(self._queues),
+                "max_hedges": self.max_hedges,
+                "hedging": self.hedging,
+                **self.stats,
+            }
+
+    def shutdown(self, wait=False):
+        """Cancel the queued jobs and stop the threads once idle."""
+        with self._lock:
+            self._closed = True
+            queues, self._queues = self._queues, {}
+        for queue in queues.values():
+            for future, _func, _args in queue:
+                future.cancel()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._hedge_executor.shutdown(wait=wait, cancel_futures=True)
+
+
+@callback
+def async_get_executor(hass: HomeAssistant):
+    """Return the thread pool of the component, started on first use."""
+    if DATA_EXECUTOR not in hass.data:
+        hass.data[DATA_EXECUTOR] = WasherExecutor()
+
+        @callback
+        def async_stop(_event):
+            # Probes and verification reads must not submit to a stopped pool
+            for washer in hass.data.get(DOMAIN, {}).values():
+                washer.async_shutdown()
+            async_shutdown_executor(hass)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop)
+    return hass.data[DATA_EXECUTOR]
+
+
+@callback
+def async_shutdown_executor(hass: HomeAssistant):
+    """Stop the thread pool of the component."""
+    executor = hass.data.pop(DATA_EXECUTOR, None)
+    if executor is not None:
+        _LOGGER.debug("Shutting down the washer executor: %s", executor.metrics())
+        executor.shutdown()
@@ -1,10 +1,11 @@
 """Switch of the Xiaomi/Viomi Washing Machine component."""
 
+import asyncio
 import logging
-import time
-from datetime import datetime, timedelta
+from datetime import timedelta
+from functools import partial
 
-from miio import Device, DeviceException
+from miio import DeviceException
 
 import voluptuous as vol
 import homeassistant.helpers.config_validation as cv
@@ -31,21 +32,21 @@ from .const import (
     CONF_MODEL,
     DATA_DEVICE,
     DATA_KEY,
+    DEFAULT_DRY_MODE,
     DEFAULT_NAME,
     DOMAIN,
     MODELS_ALL_DEVICES,
     WASHER_PROGS,
     WASHER_PROPS
 )
+from .protocol import MiioDevice
+from .washer import ViomiWasher
 
 
 _LOGGER = logging.getLogger(__name__)
 
 SCAN_INTERVAL = timedelta(seconds=60)
 
-APPOINT_MIN = 1  # 3 in app default
-APPOINT_MAX = 23  # 19 in app default
-DEFAULT_DRY_MODE = 30721 #
 DEFAULT_APPOINT_TIME = -8 # -8 means 8 o'clock, 8 means 8 hours later
 
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
@@ -88,7 +89,7 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         if model in MODELS_ALL_DEVICES:
             washer = hass.data[DOMAIN][host]
             if not washer:
-                washer = Device(host, token)
+                washer = ViomiWasher(hass, MiioDevice(host, token))
             device = ViomiWashingMachine(name, washer, config_entry, unique_id)
             entities.append(device)
             hass.data[DATA_KEY][host][DATA_DEVICE] = device
@@ -112,15 +113,13 @@ class ViomiWashingMachine(FanEntity, RestoreEntity):
         self._model = entry.options[CONF_MODEL]
         self._mac = entry.options[CONF_MAC]
         self._attr_unique_id = unique_id if unique_id else "fan_viomi_washer_" + entry.options[CONF_HOST]
-        self._status = {'dash_extra_forced': True,
-                        'genie_deviceType': 'washmachine'}
-        self._state = None
-        self._skip_update = False
         self._dry_mode = 0
         self._appoint_time = 0
 
     async def async_added_to_hass(self):
         await super().async_added_to_hass()
+        self.async_on_remove(
+            self._device.async_add_listener(self.async_write_ha_state))
         last_state = await self.async_get_last_state()
         # _LOGGER.info("async_added_to_hass: %s", last_state)
         if last_state:
@@ -145,107 +144,73 @@ class ViomiWashingMachine(FanEntity, RestoreEntity):
 
     @property
     def available(self):
-        """Return true when state is known."""
-        return self._state is not None
+        """Return true when the washer answers its probe."""
+        return self._device.available
 
     @property
     def extra_state_attributes(self):
         """Return the state attributes of the device."""
-        return self._status
+        return self._device.snapshot.attributes
 
     @property
     def device_info(self):
         """Return the device info."""
-        info = self._device.info()
+        info = self._device.device_info
         device_info = {
             "identifiers": {(DOMAIN, self._attr_unique_id)},
             "manufacturer": (self._model or "Xiaomi").split(".", 1)[0].capitalize(),
             "name": self._name,
-            "model": self._model,
-            "sw_version": info.firmware_version,
-            "hw_version": info.hardware_version
+            "model": self._model
         }
 
+        if info is not None:
+            device_info["sw_version"] = info.firmware_version
+            device_info["hw_version"] = info.hardware_version
+
         if self._mac is not None:
             device_info["connections"] = {(dr.CONNECTION_NETWORK_MAC, self._mac)}
 
         return device_info
 
-    def update(self):
+    async def async_update(self):
         """Fetch state from the device."""
-        if self._skip_update:
-            self._skip_update = False
-            return
-
-        status = {}
         try:
-            values = self._device.get_properties(WASHER_PROPS, max_properties=1)
-            status = dict(zip(WASHER_PROPS, values))
-            self._status.update(status)
-            self._state = status['wash_status'] == 1 and (
-                (status['wash_process'] > 0 and status['wash_process'] < 7) or status['appoint_time'] != 0)
+            await self._device.async_update(WASHER_PROPS)
         except Exception as ex:
             _LOGGER.error("Error on update: %s", ex)
-            self._state = None
-
-        if self._state:  # Update dash name for status
-            dash_name = '剩' + str(status['remain_time']) + '分'
-            appoint_time = status['appoint_time']
-            if appoint_time:
-                dash_name += '/' + str(appoint_time) + '時'
-            if status['DryMode']:
-                dash_name += '+烘'
-            self._status['dash_name'] = dash_name
-        elif 'dash_name' in status:
-            del status['dash_name']
 
     @property
     def is_on(self):
         """Return true if device is on."""
-        return self._state
+        if not self._device.available:
+            return None
+        return self._device.snapshot.is_on
 
-    def turn_on(self, speed=None, **kwargs):
-        """Turn the device on."""
+    async def async_turn_on(self, speed=None, percentage=None, preset_mode=None, **kwargs):
+        """Turn the device on, one executor job per command."""
         _LOGGER.debug('turn_on: speed=%s, kwargs=%s', speed, kwargs)
 
         # Turn up
+        program = None
         if speed:
-            self.set_speed(speed)
+            await self._device.async_run(self.set_speed, speed)
+            await asyncio.sleep(1)
         else:
-            self.set_wash_program(self._status.get('program') or 'goldenwash')
-        time.sleep(1)
+            program = self._device.snapshot.get('program') or 'goldenwash'
 
-        # Set dry mode
         dry_mode = DEFAULT_DRY_MODE if self._dry_mode == 1 else self._dry_mode
-        if self._status.get('DryMode') != dry_mode:
-            if not self.control("SetDryMode", dry_mode):
-                return
-            time.sleep(1)
-
-        # Calc appoint time
-        appoint_time = self._appoint_time
-        if appoint_time < 0:
-            appoint_clock = -appoint_time
-            now = datetime.now()
-            hour = now.hour
-            if now.minute > 10:
-                hour += 1
-            if hour <= appoint_clock - APPOINT_MIN:
-                appoint_time = appoint_clock - hour
-            elif hour >= appoint_clock + 24 - APPOINT_MAX:
-                appoint_time = appoint_clock + 24 - hour
-            else:
-                appoint_time = 0
-
-        if self.control('set_appoint_time' if appoint_time else 'set_wash_action', appoint_time or 1):
-            self._state = True
-            self._skip_update = True
+        try:
+            await self._device.async_start_cycle(program, dry_mode, self._appoint_time)
+        except (DeviceException, Exception) as exc:
+            _LOGGER.error("Error on control: %s", exc)
 
     def turn_off(self, **kwargs):
         """Turn the device off."""
-        if self.control('set_wash_action', 2):
-            self._state = False
-            self._skip_update = True
+        self.control('set_wash_action', 2)
+
+    async def async_turn_off(self, **kwargs):
+        """Turn the device off in the executor of the washer."""
+        await self._device.async_run(partial(self.turn_off, **kwargs))
 
     @property
     def speed_list(self):
@@ -255,7 +220,7 @@ class ViomiWashingMachine(FanEntity, RestoreEntity):
     @property
     def speed(self):
         """Return the current speed."""
-        return WASHER_PROGS.get(self._status.get('program'))
+        return WASHER_PROGS.get(self._device.snapshot.get('program'))
 
     def set_speed(self, speed):
         """Set the speed of the fan."""
@@ -309,14 +274,10 @@ class ViomiWashingMachine(FanEntity, RestoreEntity):
     def control(self, name, value):
         _LOGGER.debug('Waher control: %s=%s', name, value)
         try:
-            return self._device.send(name, [value]) == ['ok']
+            return self._device.control(name, value)
         except (DeviceException, Exception) as exc:
             _LOGGER.error("Error on control: %s", exc)
             return None
 
     def set_wash_program(self, program):
-        if self.control('set_wash_program', program):
-            self._status['program'] = program
-            self._skip_update = True
-            return True
-        return False
+        return bool(self.control('set_wash_program', program))
@@ -0,0 +1,146 @@
+"""Wash cycle history of the Xiaomi/Viomi Washing Machine component."""
+import logging
+from bisect import bisect_left, insort
+from collections import deque
+from typing import NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    EVENT_APPOINTMENT_STARTED,
+    EVENT_CYCLE_FINISHED,
+    EVENT_CYCLE_STARTED,
+    HISTORY_SIZE,
+    SAVE_DELAY,
+    STORAGE_VERSION
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+CYCLE_EVENTS = {EVENT_APPOINTMENT_STARTED, EVENT_CYCLE_STARTED, EVENT_CYCLE_FINISHED}
+
+
+class CycleRecord(NamedTuple):
+    """One finished wash cycle, stored as a JSON array."""
+
+    program: str
+    start: int
+    end: int
+    dry_mode: int
+    appoint_time: int
+
+    @property
+    def duration(self):
+        """Return the length of the cycle in minutes."""
+        return (self.end - self.start) / 60
+
+
+class ProgramStats:
+    """Aggregates of the cycles of one program, updated per record."""
+
+    __slots__ = ("count", "total", "dried", "durations")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.dried = 0
+        self.durations = []
+
+    def add(self, record):
+        """Count a record in."""
+        self.count += 1
+        self.total += record.duration
+        self.dried += bool(record.dry_mode)
+        insort(self.durations, record.duration)
+
+    def remove(self, record):
+        """Count a record out."""
+        self.count -= 1
+        self.total -= record.duration
+        self.dried -= bool(record.dry_mode)
+        del self.durations[bisect_left(self.durations, record.duration)]
+
+    @property
+    def mean(self):
+        """Return the mean duration in minutes."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, point):
+        """Return the nearest-rank percentile of the durations."""
+        if not self.count:
+            return None
+        return self.durations[max(0, -(-point * self.count // 100) - 1)]
+
+    @property
+    def dry_share(self):
+        """Return the share of cycles with dry mode on."""
+        return self.dried / self.count if self.count else None
+
+
+class CycleHistory:
+    """Bounded ring buffer of finished cycles of one washer, kept in a Store."""
+
+    def __init__(self, hass: HomeAssistant, key, size=HISTORY_SIZE):
+        self.size = size
+        self.records = deque()
+        self.stats = {}
+        self._store = Store(hass, STORAGE_VERSION, key)
+        self._current = None
+        self._appoint_time = 0
+
+    def add(self, record):
+        """Append a record, dropping the oldest one when full."""
+        self.records.append(record)
+        self.stats.setdefault(record.program, ProgramStats()).add(record)
+        if len(self.records) > self.size:
+            oldest = self.records.popleft()
+            self.stats[oldest.program].remove(oldest)
+
+    async def async_load(self):
+        """Load the saved records."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        for record in data.get("records", []):
+            self.add(CycleRecord(*record))
+        if data.get("current"):
+            self._current = data["current"]
+        self._appoint_time = data.get("appoint_time", 0)
+
+    async def async_save(self):
+        """Write the records now."""
+        await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self):
+        return {
+            "records": [list(record) for record in self.records],
+            "current": self._current,
+            "appoint_time": self._appoint_time,
+        }
+
+    @callback
+    def async_observe(self, events, snapshot):
+        """Follow the cycle events of a read, return a record on finish."""
+        record = None
+        if not CYCLE_EVENTS.intersection(events):
+            return None
+        if EVENT_APPOINTMENT_STARTED in events:
+            self._appoint_time = snapshot.get('appoint_time', 0)
+        if EVENT_CYCLE_STARTED in events:
+            self._current = [
+                snapshot.get('program'),
+                int(snapshot.timestamp),
+                snapshot.get('DryMode', 0),
+                self._appoint_time,
+            ]
+            self._appoint_time = 0
+        elif EVENT_CYCLE_FINISHED in events and self._current is not None:
+            program, start, dry_mode, appoint_time = self._current
+            record = CycleRecord(
+                program, start, int(snapshot.timestamp), dry_mode, appoint_time)
+            self.add(record)
+            self._current = None
+            _LOGGER.debug("Cycle finished: %s", record)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return record
@@ -0,0 +1,280 @@
+"""miIO protocol of the Xiaomi/Viomi Washing Machine component.
+
+The AES key and IV of a washer only depend on its token, so they are
+derived once per token and the cipher is kept for every packet instead of
+being rebuilt by python-miio for each message.
+"""
+import hashlib
+import json
+import logging
+import select
+import socket
+import struct
+import time
+from collections import Counter
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from miio import DeviceError, DeviceException, DeviceInfo
+
+_LOGGER = logging.getLogger(__name__)
+
+MIIO_PORT = 54321
+MAGIC = 0x2131
+HEADER_LENGTH = 32
+BLOCK_SIZE = 16
+MAX_ID = 9999
+HEADER = struct.Struct(">HHIII")
+HELLO = bytes.fromhex("21310020" + "ff" * 28)
+RECOVERABLE_ERRORS = (-30001, -9999)
+BROADCAST = "255.255.255.255"
+UNSET_TOKENS = (b"\x00" * 16, b"\xff" * 16)
+ABORT_POLL = 0.05  # seconds between checks of the abort event while waiting for a reply
+
+
+class TokenError(DeviceException):
+    """Error to indicate the device does not accept the token."""
+
+
+class ChecksumError(TokenError):
+    """Error to indicate a reply was sealed with another token."""
+
+
+class MiioCodec:
+    """Seal and open the miIO packets of one token.
+
+    Not thread-safe, the packet buffer is shared between calls.
+    """
+
+    __slots__ = ("token", "_cipher", "_buffer")
+
+    def __init__(self, token):
+        self.token = token
+        key = hashlib.md5(token).digest()
+        iv = hashlib.md5(key + token).digest()
+        self._cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
+        self._buffer = bytearray(HEADER_LENGTH + 1024 + BLOCK_SIZE)
+
+    def _reserve(self, size):
+        """Return the packet buffer, grown to at least size bytes."""
+        if len(self._buffer) < size:
+            self._buffer = bytearray(size)
+        return memoryview(self._buffer)
+
+    def _checksum(self, view, length):
+        """Return the checksum of the packet in the view."""
+        checksum = hashlib.md5(view[:16])
+        checksum.update(self.token)
+        checksum.update(view[HEADER_LENGTH:length])
+        return checksum.digest()
+
+    def encode(self, request, did, stamp):
+        """Return the packet of a request."""
+        plain = json.dumps(request, separators=(',', ':')).encode() + b"\x00"
+        pad = BLOCK_SIZE - len(plain) % BLOCK_SIZE
+        plain += bytes((pad,)) * pad
+        length = HEADER_LENGTH + len(plain)
+        view = self._reserve(length + BLOCK_SIZE)
+
+        encryptor = self._cipher.encryptor()
+        written = encryptor.update_into(plain, view[HEADER_LENGTH:])
+        encryptor.finalize()
+        HEADER.pack_into(view, 0, MAGIC, HEADER_LENGTH + written, 0, did, stamp)
+        view[16:HEADER_LENGTH] = self._checksum(view, length)
+        return bytes(view[:length])
+
+    def decode(self, packet):
+        """Return the device id, stamp and payload of a reply packet."""
+        magic, length, _unknown, did, stamp = HEADER.unpack_from(packet)
+        if magic != MAGIC or length > len(packet):
+            raise DeviceException("Malformed reply from the device")
+        if length == HEADER_LENGTH:
+            return did, stamp, None
+
+        source = memoryview(packet)
+        if self._checksum(source, length) != packet[16:HEADER_LENGTH]:
+            raise ChecksumError(
+                "Got checksum error which indicates use of an invalid token. "
+                "Please check your token!")
+
+        size = length - HEADER_LENGTH
+        view = self._reserve(size + BLOCK_SIZE)
+        decryptor = self._cipher.decryptor()
+        written = decryptor.update_into(source[HEADER_LENGTH:length], view)
+        decryptor.finalize()
+        end = written - view[written - 1]
+        while end and view[end - 1] == 0:
+            end -= 1
+        try:
+            return did, stamp, json.loads(bytes(view[:end]))
+        except ValueError as ex:
+            raise DeviceException("Unable to parse message payload") from ex
+
+
+class MiioDevice:
+    """A miIO device speaking through one cached codec."""
+
+    def __init__(self, ip, token, start_id=0, timeout=5):
+        self.ip = ip
+        self.token = token
+        self.timeout = timeout
+        self.codec = MiioCodec(bytes.fromhex(token))
+        self._id = start_id
+        self.device_id = None
+        self._did = None
+        self._stamp = 0
+        self._stamp_at = 0.0
+        self._info = None
+        self.stats = Counter()
+
+    def _next_id(self):
+        self._id += 1
+        if self._id >= MAX_ID:
+            self._id = 1
+        return self._id
+
+    def _socket(self, timeout):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(self.timeout if timeout is None else timeout)
+        return sock
+
+    def send_handshake(self, retry_count=3, timeout=None):
+        """Send a hello packet, return the device id and stamp."""
+        self.stats['handshakes'] += 1
+        with self._socket(timeout) as sock:
+            for _ in range(retry_count + 1):
+                try:
+                    sock.sendto(HELLO, (self.ip, MIIO_PORT))
+                    data = sock.recv(1024)
+                except OSError:
+                    continue
+                _magic, _length, _unknown, did, stamp = HEADER.unpack_from(data)
+                self._did = self.device_id = did
+                self._stamp = stamp
+                self._stamp_at = time.monotonic()
+                return did, stamp
+        raise DeviceException("Unable to discover the device %s" % self.ip)
+
+    def send(self, command, parameters=None, retry_count=3, timeout=None, abort=None):
+        """Send a command and return its result.
+
+        Once the abort event is set the request stops waiting for its reply
+        and is not retried.
+        """
+        # Retries always say hello again, only a hello of the first attempt
+        # tells that the device is up while ignoring our token
+        return self._send(command, parameters, retry_count, timeout, abort, self._did is None)
+
+    def _receive(self, sock, request_id, timeout, abort):
+        """Return the stamp and payload of the reply to the request."""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            if abort is not None:
+                remaining = deadline - time.monotonic()
+                if abort.is_set() or remaining <= 0:
+                    raise TimeoutError("No reply from the device")
+                sock.settimeout(min(ABORT_POLL, remaining))
+            try:
+                data = sock.recv(4096)
+            except TimeoutError:
+                if abort is None:
+                    raise
+                continue
+            _did, stamp, payload = self.codec.decode(data)
+            # Late replies to earlier requests are skipped
+            if payload is not None and payload.get("id") == request_id:
+                return stamp, payload
+            self.stats['stale_replies'] += 1
+            _LOGGER.debug("%s skipped stale reply %s", self.ip, payload)
+
+    def _send(self, command, parameters, retry_count, timeout, abort, handshake):
+        if self._did is None:
+            self.send_handshake(retry_count, timeout)
+
+        request_id = self._next_id()
+        request = {
+            "id": request_id,
+            "method": command,
+            "params": [] if parameters is None else parameters,
+        }
+        stamp = self._stamp + int(time.monotonic() - self._stamp_at) + 1
+        packet = self.codec.encode(request, self._did, stamp)
+        _LOGGER.debug("%s:%s >>: %s", self.ip, MIIO_PORT, request)
+
+        with self._socket(timeout) as sock:
+            try:
+                sock.sendto(packet, (self.ip, MIIO_PORT))
+            except OSError as ex:
+                raise DeviceException("Failed to send to the device") from ex
+            try:
+                stamp, payload = self._receive(sock, request_id, timeout, abort)
+            except OSError as ex:
+                if abort is not None and abort.is_set():
+                    raise DeviceException("Request to the device was abandoned") from ex
+                if retry_count > 0:
+                    self.stats['retries'] += 1
+                    _LOGGER.debug("Retrying with incremented id, retries left: %s", retry_count)
+                    self._id += 100
+                    self._did = None
+                    return self._send(
+                        command, parameters, retry_count - 1, timeout, abort, handshake)
+                # The next request starts with a hello of its own
+                self._did = None
+                if handshake:
+                    # Answered the hello just now, so it is dropping our packets
+                    raise TokenError(
+                        "The device answers hello but not commands, "
+                        "its token has likely changed") from ex
+                raise DeviceException("No response from the device") from ex
+
+        self._stamp = stamp
+        self._stamp_at = time.monotonic()
+        _LOGGER.debug("%s:%s <<: %s", self.ip, MIIO_PORT, payload)
+        if "error" in payload:
+            error = payload["error"]
+            if error.get("code") in RECOVERABLE_ERRORS and retry_count > 0:
+                return self._send(
+                    command, parameters, retry_count - 1, timeout, abort, False)
+            if error.get("code") in RECOVERABLE_ERRORS:
+                raise DeviceException("Unable to recover failed command") from DeviceError(error)
+            raise DeviceError(error)
+        return payload.get("result", payload)
+
+    def info(self, retry_count=3, timeout=None):
+        """Return the miIO info of the device, cached after the first read."""
+        if self._info is None:
+            self._info = DeviceInfo(self.send("miIO.info", retry_count=retry_count, timeout=timeout))
+        return self._info
+
+
+def discover(hosts=(BROADCAST,), timeout=1.0):
+    """Send hello packets to all hosts at once, return the devices that answer.
+
+    Returns a dict of host to (device id, token). Only devices that are not
+    yet paired leak their token in the hello reply, the token is None for
+    all others.
+    """
+    found = {}
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.setblocking(False)
+        for host in hosts:
+            try:
+                sock.sendto(HELLO, (host, MIIO_PORT))
+            except OSError as ex:
+                _LOGGER.debug("Unable to send hello to %s: %s", host, ex)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([sock], [], [], remaining)[0]:
+                break
+            try:
+                data, (host, _port) = sock.recvfrom(1024)
+            except OSError:
+                continue
+            if len(data) != HEADER_LENGTH or data[:2] != HELLO[:2]:
+                continue
+            _magic, _length, _unknown, did, _stamp = HEADER.unpack_from(data)
+            token = data[16:HEADER_LENGTH]
+            found[host] = (did, None if token in UNSET_TOKENS else token.hex())
+    return found
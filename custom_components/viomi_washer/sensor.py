@@ -17,6 +17,7 @@ from .const import (
     CONF_MODEL,
     DATA_KEY,
     DOMAIN,
+    WASHER_CYCLE_SENSORS,
     WASHER_SENSORS,
     MODELS_MIIO,
     ViomiWasherSensorDescription
@@ -47,6 +48,12 @@ async def async_setup_entry(
                     [XiaomiWasherSensor(entry.options, description, name, unique_id, washer)]
                 )
 
+        if model in MODELS_MIIO and washer.history is not None:
+            entities.extend(
+                ViomiWasherCycleSensor(entry.options, description, name, unique_id, washer)
+                for description in WASHER_CYCLE_SENSORS
+            )
+
         async_add_entities(entities)
     except AttributeError as ex:
         _LOGGER.error(ex)
@@ -65,11 +72,6 @@ class XiaomiWasherSensor(SensorEntity):
         self._mac = entry_data[CONF_MAC]
         self._host = entry_data[CONF_HOST]
         self._washer = washer
-        self._available = True
-        self._skip_update = False
-        self._state = None
-        self._status = {'dash_extra_forced': True,
-                        'genie_deviceType': 'washmachine'}
         self._attr_native_unit_of_measurement = description.native_unit_of_measurement
         self._attr_device_class = description.device_class
         self._attr_state_class = description.state_class
@@ -91,40 +93,79 @@ class XiaomiWasherSensor(SensorEntity):
     @property
     def device_info(self):
         """Return the device info."""
-        info = self._washer.info()
+        info = self._washer.device_info
         device_info = {
             "identifiers": {(DOMAIN, self._unique_id)},
             "manufacturer": (self._model or "Xiaomi").split(".", 1)[0].capitalize(),
             "name": self._name,
-            "model": self._model,
-            "sw_version": info.firmware_version,
-            "hw_version": info.hardware_version
+            "model": self._model
         }
 
+        if info is not None:
+            device_info["sw_version"] = info.firmware_version
+            device_info["hw_version"] = info.hardware_version
+
         if self._mac is not None:
             device_info["connections"] = {(dr.CONNECTION_NETWORK_MAC, self._mac)}
 
         return device_info
 
+    async def async_added_to_hass(self):
+        """Follow snapshot changes made by other entities."""
+        self.async_on_remove(
+            self._washer.async_add_listener(self.async_write_ha_state))
+
+    @property
+    def available(self):
+        """Return true when the washer answers its probe."""
+        return self._washer.available
+
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        return self._state
+        return self._washer.snapshot.get(self._attr)
 
     async def async_update(self):
         """Fetch state from the device."""
-        # On state change the device doesn't provide the new state immediately.
-        if self._skip_update:
-            self._skip_update = False
-            return
-
-        status = self._status
         try:
-            status[self._attr] = self._washer.get_properties([self._attr], max_properties=1)[0]
-            self._state = status[self._attr]
-            _LOGGER.debug("Got new state: %s", status)
-
+            await self._washer.async_update((self._attr,))
         except DeviceException as ex:
-            if self._available:
-                self._available = False
-                _LOGGER.error("Got exception while fetching the state: %s", ex)
+            _LOGGER.error("Error on update: %s", ex)
+
+
+class ViomiWasherCycleSensor(XiaomiWasherSensor):
+    """Mean cycle time of one program, from the cycle history of the washer."""
+
+    _attr_should_poll = False
+
+    @property
+    def available(self):
+        """Return true, the history is kept locally."""
+        return True
+
+    @property
+    def _stats(self):
+        return self._washer.history.stats.get(self.entity_description.program)
+
+    @property
+    def native_value(self):
+        """Return the mean cycle time in minutes."""
+        stats = self._stats
+        if stats is None or not stats.count:
+            return None
+        return round(stats.mean, 1)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the cycle count, p90 cycle time and share of dried cycles."""
+        stats = self._stats
+        if stats is None or not stats.count:
+            return {"count": 0}
+        return {
+            "count": stats.count,
+            "p90": round(stats.percentile(90), 1),
+            "dry_share": round(stats.dry_share, 2),
+        }
+
+    async def async_update(self):
+        """Nothing to fetch, the history follows the reads of the washer."""
@@ -0,0 +1,124 @@
+"""Services of the Xiaomi/Viomi Washing Machine component."""
+import asyncio
+import logging
+import time
+
+import voluptuous as vol
+
+import homeassistant.helpers.config_validation as cv
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.helpers import entity_registry as er
+from miio import DeviceException
+
+from .const import (
+    DEFAULT_EXECUTOR_WORKERS,
+    DEFAULT_PARALLELISM,
+    DOMAIN,
+    WASHER_PROGS
+)
+from .washer import async_get_washer
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BATCH_COMMAND = "batch_command"
+
+ATTR_ACTION = "action"
+ATTR_PROGRAM = "program"
+ATTR_DRY_MODE = "dry_mode"
+ATTR_APPOINT_TIME = "appoint_time"
+ATTR_PARALLELISM = "parallelism"
+
+ACTION_START = "start"
+ACTION_STOP = "stop"
+
+
+def _program(value):
+    """Return the program key of a key or a program name."""
+    for program, name in WASHER_PROGS.items():
+        if value in (program, name):
+            return program
+    raise vol.Invalid("Unknown program: {}".format(value))
+
+
+BATCH_COMMAND_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Required(ATTR_ACTION): vol.In([ACTION_START, ACTION_STOP]),
+        vol.Optional(ATTR_PROGRAM): vol.All(cv.string, _program),
+        vol.Optional(ATTR_DRY_MODE): vol.Coerce(int),
+        vol.Optional(ATTR_APPOINT_TIME, default=0): vol.All(
+            vol.Coerce(int), vol.Range(min=-23, max=23)),
+        # More washers at once would only queue for the threads of the executor
+        vol.Optional(ATTR_PARALLELISM, default=DEFAULT_PARALLELISM): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=DEFAULT_EXECUTOR_WORKERS)),
+    }
+)
+
+
+async def async_batch_command(hass: HomeAssistant, call: ServiceCall):
+    """Start or stop many washers concurrently."""
+    registry = er.async_get(hass)
+    semaphore = asyncio.Semaphore(call.data[ATTR_PARALLELISM])
+    action = call.data[ATTR_ACTION]
+
+    async def async_run(washer):
+        if washer is None:
+            return {"success": False, "error": "not a washer"}
+
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                if action == ACTION_START:
+                    success = await washer.async_start_cycle(
+                        call.data.get(ATTR_PROGRAM),
+                        call.data.get(ATTR_DRY_MODE),
+                        call.data[ATTR_APPOINT_TIME],
+                    )
+                else:
+                    success = await washer.async_run(washer.stop_cycle)
+                error = None if success else "command rejected"
+            except DeviceException as ex:
+                success, error = False, str(ex)
+            result = {
+                "success": bool(success),
+                "duration": round(time.monotonic() - start, 3),
+            }
+        if error:
+            result["error"] = error
+            _LOGGER.warning("Batch %s of %s failed: %s", action, washer.device.ip, error)
+        return result
+
+    # Entities of the same washer share one run
+    washers = {}
+    for entity_id in call.data[ATTR_ENTITY_ID]:
+        entry = registry.async_get(entity_id)
+        washers[entity_id] = entry and async_get_washer(hass, entry.config_entry_id)
+    runs = {}
+    for washer in washers.values():
+        if washer not in runs:
+            runs[washer] = hass.async_create_task(async_run(washer))
+
+    start = time.monotonic()
+    await asyncio.gather(*runs.values())
+    return {
+        "duration": round(time.monotonic() - start, 3),
+        "results": {
+            entity_id: runs[washer].result() for entity_id, washer in washers.items()
+        },
+    }
+
+
+def async_setup_services(hass: HomeAssistant):
+    """Register the services of the component."""
+
+    async def async_handle_batch_command(call: ServiceCall):
+        return await async_batch_command(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BATCH_COMMAND,
+        async_handle_batch_command,
+        schema=BATCH_COMMAND_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
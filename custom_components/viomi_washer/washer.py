@@ -0,0 +1,715 @@
+"""Shared device state of the Xiaomi/Viomi Washing Machine component."""
+import asyncio
+import logging
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import partial
+from concurrent.futures import CancelledError
+from types import MappingProxyType
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.helpers.storage import Store
+from .const import (
+    APPOINT_MAX,
+    APPOINT_MIN,
+    HEDGE_START_ID,
+    OPERATION_POLICIES,
+    OPERATION_PROBE,
+    OPERATION_READ,
+    OPERATION_WRITE,
+    DEFAULT_FRESHNESS,
+    DOMAIN,
+    EVENT_APPOINTMENT_STARTED,
+    EVENT_CYCLE_FINISHED,
+    EVENT_CYCLE_STARTED,
+    EVENT_PROGRAM_CHANGED,
+    EVENT_RINSE_STARTED,
+    EVENT_SPIN_STARTED,
+    EVENT_WASHER,
+    PROBE_FAILURES,
+    PROBE_INTERVAL,
+    SAVE_DELAY,
+    STORAGE_KEY,
+    STORAGE_KEY_HISTORY,
+    STORAGE_VERSION,
+    TOKEN_ERRORS,
+    TOKEN_RECOVERY_COOLDOWN,
+    VERIFY_DELAY,
+    WASH_PROCESS_COMPLETE,
+    WASH_PROCESS_RINSE,
+    WASH_PROCESS_SPIN,
+    WASHER_PROPS
+)
+from .executor import async_get_executor
+from .history import CycleHistory
+from .protocol import ChecksumError, DeviceException, DeviceInfo, MiioDevice, TokenError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Attributes every washer reports, shared by all snapshots
+STATIC_ATTRIBUTES = MappingProxyType({
+    'dash_extra_forced': True,
+    'genie_deviceType': 'washmachine',
+})
+
+PROP_INDEX = MappingProxyType(
+    {prop: index for index, prop in enumerate(WASHER_PROPS)}
+)
+
+
+class WasherSnapshot:
+    """Immutable property values of a washer, indexed like WASHER_PROPS."""
+
+    __slots__ = ("values", "stamps", "timestamp", "stale", "_attributes")
+
+    def __init__(self, values=None, timestamp=None, stamps=None, stale=False):
+        empty = (None,) * len(WASHER_PROPS)
+        object.__setattr__(self, "values", tuple(values) if values else empty)
+        object.__setattr__(self, "stamps", tuple(stamps) if stamps else empty)
+        object.__setattr__(self, "timestamp", timestamp)
+        object.__setattr__(self, "stale", stale)
+        object.__setattr__(self, "_attributes", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("WasherSnapshot is immutable")
+
+    def __repr__(self):
+        return "WasherSnapshot({})".format(dict(zip(WASHER_PROPS, self.values)))
+
+    def get(self, prop, default=None):
+        """Return the value of a property, or default if unknown."""
+        index = PROP_INDEX.get(prop)
+        if index is None:
+            return default
+        value = self.values[index]
+        return default if value is None else value
+
+    def age(self, prop, now):
+        """Return seconds since the property was read from the device."""
+        stamp = self.stamps[PROP_INDEX[prop]]
+        return float("inf") if stamp is None else now - stamp
+
+    def replace(self, props, values, timestamp=None):
+        """Return a new snapshot with the given properties replaced.
+
+        Only values read from the device come with a timestamp, locally
+        applied values keep the age of the previous read. A restored
+        snapshot stays stale until every property was read again.
+        """
+        merged = list(self.values)
+        stamps = list(self.stamps)
+        for prop, value in zip(props, values):
+            index = PROP_INDEX[prop]
+            merged[index] = value
+            if timestamp is not None:
+                stamps[index] = timestamp
+        stale = self.stale
+        if stale and timestamp is not None:
+            stale = None in stamps
+        return WasherSnapshot(
+            merged, self.timestamp if timestamp is None else timestamp, stamps, stale)
+
+    def as_dict(self):
+        """Return the snapshot in the form kept in the store."""
+        return {
+            "values": dict(zip(WASHER_PROPS, self.values)),
+            "timestamp": self.timestamp,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Return a stale snapshot of data saved by as_dict.
+
+        Restored values have no read stamps, so every property counts as
+        expired and the first poll reads them all.
+        """
+        values = data.get("values", {})
+        return cls(
+            [values.get(prop) for prop in WASHER_PROPS], data.get("timestamp"), stale=True)
+
+    @property
+    def running(self):
+        """Return true if a wash cycle is running."""
+        return self.get('wash_status') == 1 and 0 < self.get('wash_process', 0) < 7
+
+    @property
+    def appointed(self):
+        """Return true if a wash cycle waits for its appointment."""
+        return self.get('wash_status') == 1 and not self.running and (
+            self.get('appoint_time', 0) > 0)
+
+    @property
+    def is_on(self):
+        """Return true if a wash cycle is running or appointed."""
+        wash_process = self.get('wash_process', 0)
+        return self.get('wash_status') == 1 and (
+            0 < wash_process < 7 or self.get('appoint_time', 0) != 0)
+
+    @property
+    def dash_name(self):
+        """Return the short status text for dashboards."""
+        dash_name = '剩' + str(self.get('remain_time')) + '分'
+        appoint_time = self.get('appoint_time')
+        if appoint_time:
+            dash_name += '/' + str(appoint_time) + '時'
+        if self.get('DryMode'):
+            dash_name += '+烘'
+        return dash_name
+
+    @property
+    def attributes(self):
+        """Return the state attributes, built once per snapshot."""
+        if self._attributes is None:
+            attributes = dict(STATIC_ATTRIBUTES)
+            for prop, value in zip(WASHER_PROPS, self.values):
+                if value is not None:
+                    attributes[prop] = value
+            if self.is_on:
+                attributes['dash_name'] = self.dash_name
+            if self.stale:
+                attributes['stale'] = True
+            object.__setattr__(self, "_attributes", MappingProxyType(attributes))
+        return self._attributes
+
+
+EMPTY_SNAPSHOT = WasherSnapshot()
+
+
+class BlockingCallError(HomeAssistantError):
+    """Error to indicate device I/O was attempted on the event loop."""
+
+
+# Result of a hedge that was never sent
+NOT_SENT = object()
+
+# Properties a successful command may change, read back to verify it
+COMMAND_PROPS = {
+    'set_wash_program': ('program',),
+    'SetDryMode': ('DryMode',),
+    'set_appoint_time': ('wash_status', 'appoint_time', 'remain_time'),
+    'set_wash_action': ('wash_status', 'wash_process', 'remain_time'),
+}
+
+
+def optimistic_values(snapshot, name, value):
+    """Return the properties and values expected after a command."""
+    if name == 'set_wash_program':
+        return ('program',), (value,)
+    if name == 'SetDryMode':
+        return ('DryMode',), (int(value),)
+    if name == 'set_appoint_time':
+        return ('wash_status', 'appoint_time'), (1, int(value))
+    if name == 'set_wash_action':
+        if int(value) == 1:
+            wash_process = snapshot.get('wash_process', 0)
+            if not 0 < wash_process < 7:
+                wash_process = 1
+            return ('wash_status', 'wash_process'), (1, wash_process)
+        return ('wash_status',), (0,)
+    return (), ()
+
+
+def cycle_events(old, new):
+    """Return the event types of the transitions between two read snapshots."""
+    if old is None or old.stale:
+        return []
+    events = []
+    if old.get('program') is not None and new.get('program') != old.get('program'):
+        events.append(EVENT_PROGRAM_CHANGED)
+    if new.appointed and not old.appointed:
+        events.append(EVENT_APPOINTMENT_STARTED)
+    if new.running and not old.running:
+        events.append(EVENT_CYCLE_STARTED)
+    wash_process = new.get('wash_process')
+    if wash_process != old.get('wash_process'):
+        if wash_process == WASH_PROCESS_RINSE:
+            events.append(EVENT_RINSE_STARTED)
+        elif wash_process == WASH_PROCESS_SPIN:
+            events.append(EVENT_SPIN_STARTED)
+        elif wash_process == WASH_PROCESS_COMPLETE:
+            events.append(EVENT_CYCLE_FINISHED)
+    return events
+
+
+def resolve_appoint_time(appoint_time, now=None):
+    """Return the delay in hours, negative values are an o'clock time."""
+    if appoint_time >= 0:
+        return appoint_time
+    appoint_clock = -appoint_time
+    now = now or datetime.now()
+    hour = now.hour
+    if now.minute > 10:
+        hour += 1
+    if hour <= appoint_clock - APPOINT_MIN:
+        return appoint_clock - hour
+    if hour >= appoint_clock + 24 - APPOINT_MAX:
+        return appoint_clock + 24 - hour
+    return 0
+
+
+@callback
+def async_get_washer(hass: HomeAssistant, entry_id):
+    """Return the washer of a config entry, whatever its current host."""
+    for washer in hass.data.get(DOMAIN, {}).values():
+        if washer.entry_id == entry_id:
+            return washer
+    return None
+
+
+class ViomiWasher:
+    """One washer shared by all of its entities."""
+
+    __slots__ = (
+        "hass", "entry_id", "options", "device", "device_info", "snapshot",
+        "available", "policies", "store", "history", "executor",
+        "freshness", "stats", "token_recovery", "_listeners", "_in_flight",
+        "_verify_props", "_verify_unsub", "_lock", "_hedge_device", "_hedge_lock",
+        "_recovery_at", "_probe_unsub", "_probe_failures", "_saved",
+        "_read_snapshot", "_token_errors"
+    )
+
+    def __init__(self, hass, device, entry=None, policies=None, freshness=DEFAULT_FRESHNESS):
+        self.hass = hass
+        self.entry_id = entry.entry_id if entry else None
+        self.options = dict(entry.options) if entry else {}
+        self.device = device
+        self.device_info = None
+        self.snapshot = EMPTY_SNAPSHOT
+        self.available = False
+        self.policies = {**OPERATION_POLICIES, **(policies or {})}
+        self.freshness = freshness
+        self.store = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY.format(entry.entry_id)) if entry else None
+        self.history = CycleHistory(
+            hass, STORAGE_KEY_HISTORY.format(entry.entry_id)) if entry else None
+        self.executor = async_get_executor(hass)
+        self.stats = Counter()
+        self.token_recovery = None
+        self._listeners = []
+        self._in_flight = {}
+        self._verify_props = set()
+        self._verify_unsub = None
+        self._lock = threading.Lock()
+        self._hedge_device = None
+        self._hedge_lock = threading.Lock()
+        self._recovery_at = None
+        self._probe_unsub = None
+        self._probe_failures = 0
+        self._saved = None
+        self._read_snapshot = None
+        self._token_errors = 0
+
+    @callback
+    def async_add_listener(self, update_callback):
+        """Listen for snapshot changes, return a function to stop."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener():
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_notify(self):
+        """Tell all entities that the snapshot has changed."""
+        for update_callback in list(self._listeners):
+            update_callback()
+        if self.store is not None and self.snapshot is not self._saved:
+            self.store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _publish(self, snapshot):
+        """Publish a snapshot from any thread."""
+        self.snapshot = snapshot
+        self.hass.loop.call_soon_threadsafe(self.async_notify)
+
+    def _data_to_save(self):
+        """Return the snapshot and device info to write to the store."""
+        self._saved = self.snapshot
+        info = None
+        if self.device_info is not None:
+            info = {key: value for key, value in self.device_info.raw.items() if key != 'token'}
+        return {**self.snapshot.as_dict(), "info": info}
+
+    async def async_restore(self):
+        """Start from the last saved snapshot, return true if there was one."""
+        if self.history is not None:
+            await self.history.async_load()
+        data = await self.store.async_load() if self.store is not None else None
+        if not data:
+            return False
+        self.snapshot = self._saved = WasherSnapshot.from_dict(data)
+        if data.get("info"):
+            self.device_info = DeviceInfo(data["info"])
+        # Shown as before the restart until the first probe tells otherwise
+        self.available = True
+        return True
+
+    async def async_save(self):
+        """Write the snapshot and cycle history to their stores now."""
+        if self.store is not None:
+            await self.store.async_save(self._data_to_save())
+        if self.history is not None:
+            await self.history.async_save()
+
+    async def async_run(self, func, *args):
+        """Run blocking work after the earlier jobs of this washer."""
+        return await self.executor.async_run(func, *args, key=self)
+
+    def _check_loop(self):
+        """Refuse synchronous network calls made on the event loop thread."""
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if running_loop is not self.hass.loop:
+            return
+        if running_loop.get_debug() or _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.warning(
+                "Blocking call to %s on the event loop from:\n%s",
+                self.device.ip, "".join(traceback.format_stack()[:-2]))
+        raise BlockingCallError(
+            "Blocking call to {} inside the event loop".format(self.device.ip))
+
+    @staticmethod
+    def _send(device, lock, policy, command, parameters, abort=None):
+        """Send one request with the timeout and retries of a policy."""
+        with lock:
+            return device.send(
+                command, parameters, retry_count=policy.retries, timeout=policy.timeout,
+                abort=abort)
+
+    def _send_hedged(self, policy, command, parameters):
+        """Send an idempotent request, duplicating it if the reply is late.
+
+        The request runs on the calling worker and its duplicate on a hedge
+        thread of the executor. The first reply settles both, the other one
+        stops waiting and releases its lock. A definite error settles both
+        as well.
+        """
+        settled = threading.Event()
+        hedge = self.executor.submit_hedge(
+            self._hedge, settled, policy, command, parameters, key=self)
+        try:
+            result = self._send(self.device, self._lock, policy, command, parameters, settled)
+        except DeviceException as ex:
+            # Only a request that timed out or was abandoned for the hedge
+            # may still be answered by it
+            if hedge is None or not isinstance(ex.__cause__, OSError):
+                settled.set()
+                raise
+            if self._hedge_result(hedge) is NOT_SENT:
+                raise
+            self.stats['hedge_won'] += 1
+            return hedge.result()
+        settled.set()
+        return result
+
+    def _hedge(self, settled, policy, command, parameters):
+        """Duplicate a request that got no reply within hedge_after."""
+        if settled.wait(policy.hedge_after):
+            return NOT_SENT
+        device = self._hedge_device
+        if device is None:
+            device = self._hedge_device = MiioDevice(
+                self.device.ip, self.device.token, start_id=HEDGE_START_ID)
+        self.stats['hedge_sent'] += 1
+        result = self._send(device, self._hedge_lock, policy, command, parameters, settled)
+        settled.set()
+        return result
+
+    @staticmethod
+    def _hedge_result(hedge):
+        """Wait for a hedge, return NOT_SENT unless it got a reply."""
+        try:
+            return hedge.result()
+        except (CancelledError, DeviceException):
+            return NOT_SENT
+
+    def call(self, operation, command, parameters=None):
+        """Send a request using the policy of the operation."""
+        self._check_loop()
+        policy = self.policies[operation]
+        self.stats[operation] += 1
+        try:
+            if policy.hedge_after is None:
+                result = self._send(self.device, self._lock, policy, command, parameters)
+            else:
+                result = self._send_hedged(policy, command, parameters)
+        except TokenError as ex:
+            # A lost reply looks the same once, a foreign checksum or a
+            # repeat over several requests is worth a cloud lookup
+            self._token_errors += 1
+            if isinstance(ex, ChecksumError) or self._token_errors >= TOKEN_ERRORS:
+                self.hass.loop.call_soon_threadsafe(self._async_start_token_recovery)
+            raise
+        self._token_errors = 0
+        return result
+
+    def set_connection(self, host, token):
+        """Talk to the device at host with token from now on."""
+        self.device = MiioDevice(host, token)
+        self._hedge_device = None
+
+    async def async_reconfigure(self, host, token):
+        """Switch host and token live, handshake and poll once."""
+        if host == self.device.ip and token == self.device.token:
+            return False
+        self.set_connection(host, token)
+        try:
+            await self.async_run(partial(self.device.send_handshake, retry_count=1))
+            await self.async_run(self.update)
+        except DeviceException as ex:
+            _LOGGER.warning("Unable to reach %s with the new options: %s", host, ex)
+            self.available = False
+        else:
+            self._probe_failures = 0
+            self.available = True
+        self.async_notify()
+        return True
+
+    @callback
+    def _async_start_token_recovery(self):
+        """Look up a changed token, at most once per cooldown."""
+        now = time.monotonic()
+        if self.token_recovery is None or (
+                self._recovery_at is not None
+                and now - self._recovery_at < TOKEN_RECOVERY_COOLDOWN):
+            return
+        self._recovery_at = now
+        self.stats['token_recovery'] += 1
+        self.hass.async_create_task(self.token_recovery())
+
+    def info(self):
+        """Return the miIO info of the device."""
+        self._check_loop()
+        policy = self.policies[OPERATION_PROBE]
+        with self._lock:
+            self.device_info = self.device.info(
+                retry_count=policy.retries, timeout=policy.timeout)
+        return self.device_info
+
+    def probe(self):
+        """Send a hello packet, return true if the device answered."""
+        self._check_loop()
+        if not self._lock.acquire(blocking=False):
+            # A request is in flight, its outcome tells the availability
+            self.stats['probes_skipped'] += 1
+            return self.available
+        policy = self.policies[OPERATION_PROBE]
+        try:
+            self.device.send_handshake(retry_count=policy.retries, timeout=policy.timeout)
+        except DeviceException:
+            return False
+        finally:
+            self._lock.release()
+        return True
+
+    async def async_probe(self, _now=None):
+        """Probe the device and publish changes of its availability."""
+        self.stats['probes'] += 1
+        # Not queued behind the jobs of the washer, probe skips a busy one
+        online = await self.executor.async_run(self.probe)
+        if online:
+            self._probe_failures = 0
+        else:
+            self._probe_failures += 1
+            if self._probe_failures < PROBE_FAILURES and self.available:
+                return self.available
+        if online == self.available:
+            return online
+
+        _LOGGER.info("%s is %s", self.device.ip, "online" if online else "offline")
+        self.available = online
+        if online:
+            # Back online, catch up on what changed while away
+            try:
+                await self.async_update(max_age=0)
+            except Exception as ex:  # pylint: disable=broad-except
+                _LOGGER.debug("Error on update of %s: %s", self.device.ip, ex)
+        self.async_notify()
+        return self.available
+
+    @callback
+    def async_start_probe(self, interval=PROBE_INTERVAL):
+        """Probe soon and then every interval seconds."""
+        self._probe_unsub = async_track_time_interval(
+            self.hass, self.async_probe, timedelta(seconds=interval))
+        self.hass.async_create_task(self.async_probe())
+
+    async def async_fetch_info(self):
+        """Fetch the miIO info in the executor, for device_info."""
+        return await self.async_run(self.info)
+
+    def send(self, command, parameters=None):
+        """Send a command to the device."""
+        return self.call(OPERATION_WRITE, command, parameters)
+
+    def get_properties(self, props):
+        """Read properties one at a time, the device rejects batches."""
+        values = []
+        for prop in props:
+            values.extend(self.call(OPERATION_READ, 'get_prop', [prop]))
+        return values
+
+    def update(self, props=WASHER_PROPS):
+        """Read the given properties and publish a new snapshot.
+
+        Availability is left to the probe, a failed read says nothing new.
+        """
+        props = list(props)
+        values = self.get_properties(props)
+        now = time.time()
+        self.snapshot = self.snapshot.replace(props, values, now)
+        _LOGGER.debug("Got new state: %s", self.snapshot)
+        # Transitions are told by reads only, never by optimistic values, and
+        # not before every property was read once
+        previous = self._read_snapshot
+        read = self._read_snapshot = (
+            previous or WasherSnapshot(stale=True)).replace(props, values, now)
+        events = cycle_events(previous, read)
+        if events:
+            self.hass.loop.call_soon_threadsafe(self._async_fire_events, events, read)
+        return self.snapshot
+
+    @callback
+    def _async_fire_events(self, events, snapshot):
+        """Fire a bus event for each transition of the washer."""
+        device_id = None
+        if self.entry_id is not None:
+            devices = dr.async_entries_for_config_entry(dr.async_get(self.hass), self.entry_id)
+            device_id = devices[0].id if devices else None
+        if self.history is not None:
+            self.history.async_observe(events, snapshot)
+        for event_type in events:
+            _LOGGER.debug("%s of %s", event_type, self.device.ip)
+            self.stats['events'] += 1
+            self.hass.bus.async_fire(EVENT_WASHER, {
+                "device_id": device_id,
+                "entry_id": self.entry_id,
+                "type": event_type,
+                "program": snapshot.get('program'),
+                "wash_process": snapshot.get('wash_process'),
+                "remain_time": snapshot.get('remain_time'),
+            })
+
+    async def async_update(self, props=WASHER_PROPS, max_age=None):
+        """Read the properties unless fresh, sharing reads already in flight."""
+        if not self.available and self._probe_unsub is not None:
+            # The probe reads everything once the device is back
+            self.stats['reads_skipped'] += 1
+            return self.snapshot
+
+        max_age = self.freshness if max_age is None else max_age
+        now = time.time()
+        stale = frozenset(
+            prop for prop in props if self.snapshot.age(prop, now) > max_age)
+        if not stale:
+            self.stats['reads_cached'] += 1
+            return self.snapshot
+
+        for flight_props, future in self._in_flight.items():
+            if stale <= flight_props:
+                self.stats['reads_coalesced'] += 1
+                return await asyncio.shield(future)
+
+        future = self.hass.loop.create_future()
+        self._in_flight[stale] = future
+        try:
+            snapshot = await self.async_run(
+                self.update, [prop for prop in WASHER_PROPS if prop in stale])
+        except Exception as ex:
+            future.set_exception(ex)
+            future.exception()  # retrieved here, waiters get it too
+            raise
+        else:
+            future.set_result(snapshot)
+        finally:
+            del self._in_flight[stale]
+            if not future.done():
+                # Cancelled, the reads sharing this one must not wait forever
+                future.set_exception(DeviceException("The shared read was cancelled"))
+                future.exception()
+        self.async_notify()
+        return snapshot
+
+    def apply(self, props, values):
+        """Publish locally known property values."""
+        self._publish(self.snapshot.replace(props, values))
+        return self.snapshot
+
+    def control(self, name, value):
+        """Send a command, apply its expected effect and verify it later."""
+        if self.send(name, [value]) != ['ok']:
+            return False
+        self.apply(*optimistic_values(self.snapshot, name, value))
+        self.schedule_verify(COMMAND_PROPS.get(name, WASHER_PROPS))
+        return True
+
+    async def async_start_cycle(self, program=None, dry_mode=None, appoint_time=0):
+        """Set program and dry mode, then start now or by appointment.
+
+        Each command is a job of its own, the washer gets a second between
+        them without holding a worker of the executor.
+        """
+        if program is not None:
+            if not await self.async_run(self.control, 'set_wash_program', program):
+                return False
+            await asyncio.sleep(1)
+
+        if dry_mode is not None and self.snapshot.get('DryMode') != dry_mode:
+            if not await self.async_run(self.control, 'SetDryMode', dry_mode):
+                return False
+            await asyncio.sleep(1)
+
+        appoint_time = resolve_appoint_time(appoint_time)
+        return await self.async_run(
+            self.control,
+            'set_appoint_time' if appoint_time else 'set_wash_action', appoint_time or 1)
+
+    def stop_cycle(self):
+        """Stop the running cycle."""
+        return self.control('set_wash_action', 2)
+
+    def schedule_verify(self, props):
+        """Read back the given properties after VERIFY_DELAY seconds."""
+        self.hass.loop.call_soon_threadsafe(self._async_schedule_verify, props)
+
+    @callback
+    def _async_schedule_verify(self, props):
+        """Merge the properties into one pending verification read."""
+        self._verify_props.update(props)
+        if self._verify_unsub is None:
+            self._verify_unsub = async_call_later(
+                self.hass, VERIFY_DELAY, self._async_verify)
+
+    async def _async_verify(self, _now):
+        """Read back the properties touched by recent commands."""
+        self._verify_unsub = None
+        props = [prop for prop in WASHER_PROPS if prop in self._verify_props]
+        self._verify_props.clear()
+        try:
+            await self.async_update(props, max_age=0)
+        except Exception as ex:  # pylint: disable=broad-except
+            _LOGGER.debug("Error on verify %s: %s", props, ex)
+
+    @callback
+    def async_cancel_verify(self):
+        """Cancel a pending verification read."""
+        if self._verify_unsub is not None:
+            self._verify_unsub()
+            self._verify_unsub = None
+
+    @callback
+    def async_shutdown(self):
+        """Stop probing and cancel pending reads."""
+        self.async_cancel_verify()
+        if self._probe_unsub is not None:
+            self._probe_unsub()
+            self._probe_unsub = None
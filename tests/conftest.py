@@ -0,0 +1,65 @@
+"""Fixtures of the Xiaomi/Viomi Washing Machine component tests.
+
+The washers are the simulated ones of tools/simulator.py, listening on
+loopback addresses of this process.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "tools"))
+
+import loadtest  # noqa: E402  pylint: disable=wrong-import-position
+import simulator  # noqa: E402  pylint: disable=wrong-import-position
+
+loadtest.use_repo_components()
+
+from pytest_homeassistant_custom_component.common import (  # noqa: E402  pylint: disable=wrong-import-position
+    MockConfigEntry,
+)
+
+from custom_components.viomi_washer.const import (  # noqa: E402  pylint: disable=wrong-import-position
+    DATA_EXECUTOR,
+    DOMAIN,
+)
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration of this repository."""
+    yield
+
+
+@pytest.fixture
+async def simulated_washer(socket_enabled):
+    """Start one simulated washer, return its protocol."""
+    washers = await simulator.async_start_washers(1)
+    yield washers[0][0]
+    for _protocol, transport in washers:
+        transport.close()
+
+
+@pytest.fixture
+def entry_options():
+    """Return the options of the config entry of the simulated washer."""
+    return loadtest.entry_options(0)
+
+
+@pytest.fixture
+async def config_entry(hass, simulated_washer, entry_options):
+    """Set up the simulated washer, unload it and stop its threads afterwards."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="washer 0",
+        unique_id=simulator.washer_mac(0),
+        options=entry_options,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    executor = hass.data[DATA_EXECUTOR]
+    yield entry
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    executor.shutdown(wait=True)
@@ -0,0 +1,65 @@
+"""Tests that the entities never talk to the washer on the event loop."""
+import socket
+import threading
+from unittest.mock import patch
+
+from homeassistant.setup import async_setup_component
+
+from custom_components.viomi_washer.washer import BlockingCallError, ViomiWasher
+
+FAN = "fan.washer_0"
+SENSORS = ("sensor.washer_0_status", "sensor.washer_0_remain_time")
+
+
+class RecordingSocket(socket.socket):
+    """Socket noting the thread of every packet it sends or receives."""
+
+    threads = []
+
+    def sendto(self, *args):
+        self.threads.append(threading.get_ident())
+        return super().sendto(*args)
+
+    def recv(self, *args):
+        self.threads.append(threading.get_ident())
+        return super().recv(*args)
+
+    def recvfrom(self, *args):
+        self.threads.append(threading.get_ident())
+        return super().recvfrom(*args)
+
+
+async def test_entities_do_no_io_on_the_loop(hass, config_entry):
+    """Updates, device info and turning on and off keep the loop free of I/O."""
+    blocking = []
+    check_loop = ViomiWasher._check_loop
+
+    def recording_check_loop(washer):
+        try:
+            check_loop(washer)
+        except BlockingCallError as ex:
+            blocking.append(ex)
+            raise
+
+    assert await async_setup_component(hass, "homeassistant", {})
+    with patch.object(ViomiWasher, "_check_loop", recording_check_loop), \
+            patch("socket.socket", RecordingSocket), \
+            patch.object(RecordingSocket, "threads", []):
+        fan = hass.data["fan"].get_entity(FAN)
+        sensors = [hass.data["sensor"].get_entity(entity_id) for entity_id in SENSORS]
+        for entity in (fan, *sensors):
+            await hass.services.async_call(
+                "homeassistant", "update_entity", {"entity_id": entity.entity_id},
+                blocking=True)
+            assert entity.device_info is not None
+        await hass.services.async_call(
+            "fan", "turn_on", {"entity_id": FAN}, blocking=True)
+        assert hass.states.get(FAN).state == "on"
+        await hass.services.async_call(
+            "fan", "turn_off", {"entity_id": FAN}, blocking=True)
+        assert hass.states.get(FAN).state == "off"
+        await hass.async_block_till_done()
+
+        assert not blocking
+        assert RecordingSocket.threads
+        assert threading.get_ident() not in RecordingSocket.threads
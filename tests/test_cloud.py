@@ -0,0 +1,102 @@
+"""Tests of the Mi Cloud token recovery."""
+import json
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.components.xiaomi_miio.const import (
+    CONF_CLOUD_COUNTRY,
+    CONF_CLOUD_PASSWORD,
+    CONF_CLOUD_USERNAME
+)
+from homeassistant.const import CONF_TOKEN
+
+import loadtest
+import simulator
+from custom_components.viomi_washer.cloud import CloudTokenFetcher
+from custom_components.viomi_washer.const import (
+    DOMAIN,
+    OPERATION_READ,
+    TOKEN_ERRORS,
+    OperationPolicy
+)
+from custom_components.viomi_washer.protocol import DeviceException, TokenError
+
+NEW_TOKEN = simulator.washer_token(1)
+
+
+class FakeCloud:
+    """Mi Cloud session listing the devices of the class."""
+
+    devices = []
+
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+
+    def login(self):
+        return True
+
+    def request_country(self, _url, _country, params):
+        dids = json.loads(params["data"])["dids"]
+        return json.dumps({"result": {"list": [
+            device for device in self.devices if device["did"] in dids]}})
+
+
+@pytest.fixture(name="cloud_devices")
+def cloud_devices_fixture():
+    """Return the device list of the fake cloud."""
+    with patch.object(FakeCloud, "devices", []):
+        yield FakeCloud.devices
+
+
+@pytest.fixture
+def entry_options():
+    """Return options with a cloud account."""
+    return {
+        **loadtest.entry_options(0),
+        CONF_CLOUD_USERNAME: "user",
+        CONF_CLOUD_PASSWORD: "password",
+        CONF_CLOUD_COUNTRY: "cn",
+    }
+
+
+def test_get_token_without_mac(cloud_devices):
+    """Devices are matched by did when the entry has no MAC address."""
+    cloud_devices.append({"did": "1", "mac": "02:00:00:00:00:01", "token": NEW_TOKEN})
+    fetcher = CloudTokenFetcher("user", "password", "cn", FakeCloud)
+
+    assert fetcher.get_token(1, None) == NEW_TOKEN
+    assert fetcher.get_token(2, None) is None
+
+
+async def test_token_recovery_in_place(hass, simulated_washer, cloud_devices, config_entry):
+    """A re-paired washer gets its new token from the cloud without a reload."""
+    host = simulator.washer_host(0)
+    washer = hass.data[DOMAIN][host]
+    washer.policies[OPERATION_READ] = OperationPolicy(0.3, 1)
+    cloud_devices.append({
+        "did": str(simulated_washer.did),
+        "mac": simulator.washer_mac(0),
+        "token": NEW_TOKEN,
+    })
+    simulated_washer.pair(NEW_TOKEN)
+
+    with patch("custom_components.viomi_washer.cloud.MiCloud", FakeCloud), \
+            patch.object(hass.config_entries, "async_reload") as reload:
+        # The session of the old token had no hello to tell anything
+        with pytest.raises(DeviceException):
+            await hass.async_add_executor_job(washer.update)
+        for attempt in range(TOKEN_ERRORS):
+            with pytest.raises(TokenError):
+                await hass.async_add_executor_job(washer.update)
+            await hass.async_block_till_done()
+            # A single unanswered request is not enough to ask the cloud
+            assert washer.stats["token_recovery"] == (attempt + 1 == TOKEN_ERRORS)
+
+    assert hass.data[DOMAIN][host] is washer
+    assert washer.device.token == NEW_TOKEN
+    assert config_entry.options[CONF_TOKEN] == NEW_TOKEN
+    reload.assert_not_called()
+    assert washer.snapshot.timestamp is not None
+    assert await hass.async_add_executor_job(washer.update) is washer.snapshot
@@ -0,0 +1,18 @@
+"""Tests of the washer thread pool."""
+import pytest
+
+from custom_components.viomi_washer.executor import WasherExecutor
+
+
+def test_submit_after_shutdown():
+    """A stopped pool refuses jobs without leaving their key busy."""
+    executor = WasherExecutor(max_workers=1)
+    assert executor.submit(len, "ab", key="washer").result(1) == 2
+    executor.shutdown(wait=True)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            executor.submit(len, "ab", key="washer")
+    metrics = executor.metrics()
+    assert metrics["busy_keys"] == 0
+    assert metrics["queued"] == 0
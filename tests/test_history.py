@@ -0,0 +1,63 @@
+"""Tests of the wash cycle history."""
+import pytest
+
+from custom_components.viomi_washer.const import (
+    EVENT_APPOINTMENT_STARTED,
+    EVENT_CYCLE_FINISHED,
+    EVENT_CYCLE_STARTED,
+    EVENT_PROGRAM_CHANGED
+)
+from custom_components.viomi_washer.history import CycleHistory, CycleRecord
+from custom_components.viomi_washer.washer import EMPTY_SNAPSHOT
+
+START = 1700000000
+
+
+def cycle(program, minutes, dry_mode=0):
+    """Return a record of a cycle of the given length."""
+    return CycleRecord(program, START, START + minutes * 60, dry_mode, 0)
+
+
+def snapshot(timestamp, **values):
+    """Return a snapshot read at timestamp."""
+    return EMPTY_SNAPSHOT.replace(list(values), list(values.values()), timestamp)
+
+
+async def test_statistics_follow_eviction(hass):
+    """Records beyond size drop out of the buffer and the statistics."""
+    history = CycleHistory(hass, "viomi_washer_test_history", size=4)
+    history.add(cycle("quick", 15))
+    for minutes, dry_mode in ((90, 0), (60, 30721), (120, 30721), (30, 0), (150, 30721)):
+        history.add(cycle("goldenwash", minutes, dry_mode))
+
+    assert len(history.records) == 4
+    assert [record.duration for record in history.records] == [60, 120, 30, 150]
+    assert history.stats["quick"].count == 0
+    assert history.stats["quick"].mean is None
+    stats = history.stats["goldenwash"]
+    assert stats.count == 4
+    assert stats.mean == pytest.approx(90)
+    assert stats.percentile(90) == 150
+    assert stats.percentile(50) == 60
+    assert stats.dry_share == pytest.approx(0.75)
+
+
+async def test_observe_records_finished_cycles(hass):
+    """A started and then finished cycle becomes one record."""
+    history = CycleHistory(hass, "viomi_washer_test_history")
+
+    assert history.async_observe([EVENT_PROGRAM_CHANGED], snapshot(START)) is None
+    assert history.async_observe([EVENT_APPOINTMENT_STARTED], snapshot(
+        START, appoint_time=2)) is None
+    assert history.async_observe([EVENT_CYCLE_STARTED], snapshot(
+        START + 7200, program="quick", DryMode=30721)) is None
+    record = history.async_observe([EVENT_CYCLE_FINISHED], snapshot(START + 9000))
+
+    assert record == CycleRecord("quick", START + 7200, START + 9000, 30721, 2)
+    assert record.duration == 30
+    assert list(history.records) == [record]
+    assert history.stats["quick"].count == 1
+    # A finish without a start is not a cycle
+    assert history.async_observe([EVENT_CYCLE_FINISHED], snapshot(START + 9600)) is None
+    assert len(history.records) == 1
+    await history.async_save()
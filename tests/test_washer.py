@@ -0,0 +1,95 @@
+"""Tests of the shared washer state."""
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.viomi_washer.const import (
+    EVENT_CYCLE_STARTED,
+    EVENT_PROGRAM_CHANGED,
+    EVENT_WASHER,
+    WASHER_PROPS
+)
+from custom_components.viomi_washer.protocol import DeviceException, MiioDevice
+from custom_components.viomi_washer.washer import ViomiWasher
+
+IDLE = {
+    "program": "goldenwash",
+    "wash_process": 0,
+    "wash_status": 0,
+    "remain_time": 0,
+    "appoint_time": 0,
+    "DryMode": 0,
+}
+
+
+def read(washer, **values):
+    """Read the given values, or all of the idle ones, from a fake device."""
+    values = values or IDLE
+    with patch.object(ViomiWasher, "get_properties", side_effect=lambda props: [
+            values[prop] for prop in props]):
+        washer.update(list(values))
+
+
+async def test_events_follow_reads_only(hass):
+    """Optimistic values neither fire events nor hide transitions."""
+    washer = ViomiWasher(hass, MiioDevice("127.0.0.1", "0" * 32))
+    events = []
+    hass.bus.async_listen(EVENT_WASHER, lambda event: events.append(event.data["type"]))
+
+    # Nothing fires until every property was read once
+    read(washer, wash_status=1, wash_process=1)
+    await hass.async_block_till_done()
+    assert not events
+    read(washer)
+    await hass.async_block_till_done()
+    assert not events
+
+    # The program shown changes at once, the event waits for the device
+    washer.apply(("program",), ("quick",))
+    read(washer, wash_status=0)
+    await hass.async_block_till_done()
+    assert not events
+    read(washer, program="quick")
+    await hass.async_block_till_done()
+    assert events == [EVENT_PROGRAM_CHANGED]
+
+    # A cycle started optimistically still fires once the device reports it
+    washer.apply(("wash_status", "wash_process"), (1, 1))
+    read(washer, wash_status=1, wash_process=1)
+    await hass.async_block_till_done()
+    assert events == [EVENT_PROGRAM_CHANGED, EVENT_CYCLE_STARTED]
+    assert washer.snapshot.get("program") == "quick"
+    assert len(washer.snapshot.values) == len(WASHER_PROPS)
+
+
+async def test_coalesced_reads(hass):
+    """Reads share the one in flight, and fail with it when it is cancelled."""
+    washer = ViomiWasher(hass, MiioDevice("127.0.0.1", "0" * 32))
+    release = threading.Event()
+
+    def get_properties(props):
+        release.wait(5)
+        return [IDLE[prop] for prop in props]
+
+    with patch.object(ViomiWasher, "get_properties", side_effect=get_properties):
+        lead = hass.async_create_task(washer.async_update(max_age=0))
+        await asyncio.sleep(0)
+        waiter = hass.async_create_task(washer.async_update(("program",), max_age=0))
+        await asyncio.sleep(0)
+        release.set()
+        assert await waiter is await lead
+        assert washer.snapshot.get("program") == "goldenwash"
+        assert washer.stats["reads_coalesced"] == 1
+
+        release.clear()
+        lead = hass.async_create_task(washer.async_update(max_age=0))
+        await asyncio.sleep(0)
+        waiter = hass.async_create_task(washer.async_update(("program",), max_age=0))
+        await asyncio.sleep(0)
+        lead.cancel()
+        with pytest.raises(DeviceException):
+            await asyncio.wait_for(waiter, 1)
+        release.set()
+    washer.executor.shutdown(wait=True)
@@ -0,0 +1,78 @@
+"""Measure miIO encode/decode messages per second.
+
+Compares the cached cipher codec of the integration with the per-message
+key derivation of python-miio, run from the repository root:
+
+    python tools/bench_codec.py --seconds 2
+"""
+import argparse
+import datetime
+import importlib.util
+import os
+import time
+
+from miio.protocol import Message
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = bytes.fromhex("00112233445566778899aabbccddeeff")
+REQUEST = {"id": 1234, "method": "get_prop", "params": ["wash_status"]}
+REPLY = {"id": 1234, "result": [1]}
+DID = 0x10000001
+
+
+def load_protocol():
+    """Import protocol.py alone, without Home Assistant."""
+    path = os.path.join(ROOT, "custom_components", "viomi_washer", "protocol.py")
+    spec = importlib.util.spec_from_file_location("viomi_washer_protocol", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def rate(seconds, func):
+    """Return how many times per second func runs."""
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            func()
+        count += 100
+    return count / seconds
+
+
+def miio_build(payload):
+    """Build a packet the way python-miio does."""
+    header = {
+        "length": 0,
+        "unknown": 0,
+        "device_id": DID.to_bytes(4, "big"),
+        "ts": datetime.datetime.utcfromtimestamp(1000),
+    }
+    return Message.build(
+        {"data": {"value": payload}, "header": {"value": header}, "checksum": 0},
+        token=TOKEN)
+
+
+def main():
+    """Run the benchmark and print messages per second."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0, help="time per case")
+    args = parser.parse_args()
+
+    codec = load_protocol().MiioCodec(TOKEN)
+    reply = codec.encode(REPLY, DID, 1000)
+    assert Message.parse(reply, token=TOKEN).data.value == REPLY
+    assert codec.decode(miio_build(REPLY))[2] == REPLY
+
+    cases = (
+        ("encode  cached codec", lambda: codec.encode(REQUEST, DID, 1000)),
+        ("encode  python-miio", lambda: miio_build(REQUEST)),
+        ("decode  cached codec", lambda: codec.decode(reply)),
+        ("decode  python-miio", lambda: Message.parse(reply, token=TOKEN)),
+    )
+    for name, func in cases:
+        print("{:24} {:>10.0f} msg/s".format(name, rate(args.seconds, func)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Measure how many washers one Home Assistant instance can handle.
+
+Starts N simulated viomi.washer.v5 endpoints in a child process, sets up
+one config entry per washer through async_setup_entry and refreshes all
+entities for a fixed time. Reports event loop lag percentiles, executor
+queue depth, CPU time and memory per washer.
+
+Needs Home Assistant and pytest-homeassistant-custom-component, run from
+the repository root:
+
+    python tools/loadtest.py --washers 50 --duration 60 --interval 5
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# pylint: disable=wrong-import-position
+import simulator  # noqa: E402
+
+DOMAIN = "viomi_washer"
+DATA_EXECUTOR = "viomi_washer_executor"
+PERCENTILES = (50, 90, 99, 100)
+
+
+def percentiles(samples, points=PERCENTILES):
+    """Return the nearest-rank percentiles of the samples."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {point: 0.0 for point in points}
+    return {
+        point: ordered[max(0, math.ceil(point / 100 * len(ordered)) - 1)]
+        for point in points
+    }
+
+
+class LoopMonitor:
+    """Sample event loop lag and executor queue depth."""
+
+    def __init__(self, loop, executor, period=0.05):
+        self.loop = loop
+        self.executor = executor
+        self.period = period
+        self.lag = []
+        self.queue_depth = []
+
+    async def run(self):
+        """Sample until cancelled."""
+        while True:
+            start = self.loop.time()
+            await asyncio.sleep(self.period)
+            self.lag.append(self.loop.time() - start - self.period)
+            if hasattr(self.executor, "queued"):
+                # Hedges run on threads of their own, count them as backlog too
+                self.queue_depth.append(self.executor.queued + self.executor.hedging)
+            elif hasattr(self.executor, "_work_queue"):
+                self.queue_depth.append(self.executor._work_queue.qsize())
+
+
+def entry_options(index):
+    """Return the config entry options of a simulated washer."""
+    return {
+        "config_flow_device": "device",
+        "host": simulator.washer_host(index),
+        "token": simulator.washer_token(index),
+        "model": simulator.MODEL,
+        "mac": simulator.washer_mac(index),
+        "cloud_username": None,
+        "cloud_password": None,
+        "cloud_country": None,
+    }
+
+
+def use_repo_components():
+    """Make the integration of this repository importable as a custom component."""
+    # pylint: disable=import-outside-toplevel
+    import custom_components
+
+    # The test harness ships its own custom_components package, add ours to it
+    ours = os.path.join(ROOT, "custom_components")
+    custom_components.__path__ = [ours] + [
+        path for path in custom_components.__path__ if path != ours]
+
+
+async def async_refresh(hass):
+    """Update every entity of the integration once, like a poll does."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.helpers.entity_platform import async_get_platforms
+
+    await asyncio.gather(*(
+        entity.async_update_ha_state(True)
+        for platform in async_get_platforms(hass, DOMAIN)
+        for entity in list(platform.entities.values())
+    ), return_exceptions=True)
+
+
+async def async_run(args):
+    """Set up the washers, poll them and collect the measurements."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant import core, loader  # noqa: F401  core first, loader needs it
+    from pytest_homeassistant_custom_component.common import (
+        MockConfigEntry,
+        async_test_home_assistant,
+    )
+
+    use_repo_components()
+
+    async with async_test_home_assistant() as hass:
+        hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+        monitor = LoopMonitor(hass.loop, getattr(hass.loop, "_default_executor", None))
+        monitor_task = hass.loop.create_task(monitor.run())
+
+        # Import the platforms first so module code does not count per washer
+        for module in ("config_flow", "fan", "sensor"):
+            await hass.async_add_executor_job(
+                importlib.import_module, "custom_components.{}.{}".format(DOMAIN, module))
+
+        tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        setup_start = time.monotonic()
+        for index in range(args.washers):
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                title="washer {}".format(index),
+                unique_id=simulator.washer_mac(index),
+                options=entry_options(index),
+            )
+            entry.add_to_hass(hass)
+            await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        setup_time = time.monotonic() - setup_start
+        # Setup is still warming up the executors here, sample the washer pool now
+        monitor.executor = hass.data.get(
+            DATA_EXECUTOR, getattr(hass.loop, "_default_executor", None))
+        monitor.lag.clear()
+        monitor.queue_depth.clear()
+
+        cpu_start = time.process_time()
+        run_start = time.monotonic()
+        polls = 0
+        while time.monotonic() - run_start < args.duration:
+            tick = time.monotonic()
+            await async_refresh(hass)
+            polls += 1
+            await asyncio.sleep(max(0.0, args.interval - (time.monotonic() - tick)))
+        cpu_time = time.process_time() - cpu_start
+        run_time = time.monotonic() - run_start
+        memory_after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        monitor_task.cancel()
+        await hass.async_stop(force=True)
+
+    return {
+        "washers": args.washers,
+        "setup_seconds": round(setup_time, 3),
+        "run_seconds": round(run_time, 3),
+        "polls": polls,
+        "loop_lag_ms": {
+            "p{}".format(point): round(value * 1000, 2)
+            for point, value in percentiles(monitor.lag).items()
+        },
+        "executor_queue_depth": {
+            "p{}".format(point): value
+            for point, value in percentiles(monitor.queue_depth).items()
+        },
+        "cpu_seconds": round(cpu_time, 3),
+        "cpu_seconds_per_washer_minute": round(
+            cpu_time / args.washers / run_time * 60, 4),
+        "memory_kib_per_washer": round(
+            (memory_after - memory_before) / args.washers / 1024, 1),
+    }
+
+
+def main():
+    """Run the load test and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--washers", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=60, help="seconds of polling")
+    parser.add_argument("--interval", type=float, default=5, help="seconds between polls")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated reply delay")
+    parser.add_argument("--loss", type=float, default=0.0, help="share of dropped packets")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument(
+        "--max-lag-ms", type=float, default=None,
+        help="exit with an error if any loop lag sample is above this")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    stop = context.Event()
+    washers = context.Process(
+        target=simulator.serve,
+        args=(args.washers, args.latency, args.loss),
+        kwargs={"ready": ready, "stop": stop},
+        daemon=True,
+    )
+    washers.start()
+    ready.wait()
+    try:
+        report = asyncio.run(async_run(args))
+    finally:
+        stop.set()
+        washers.join()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print("{:32} {}".format(key, value))
+
+    if args.max_lag_ms is not None and report["loop_lag_ms"]["p100"] > args.max_lag_ms:
+        sys.exit("Event loop blocked for {} ms, limit is {} ms".format(
+            report["loop_lag_ms"]["p100"], args.max_lag_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Simulated viomi.washer.v5 miIO endpoints for the tools in this directory.
+
+Every simulated washer listens on UDP port 54321 of its own loopback
+address (127.1.x.y), because python-miio always talks to that port.
+
+    python tools/simulator.py --washers 10
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import struct
+import time
+from collections import Counter
+
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+MIIO_PORT = 54321
+MODEL = "viomi.washer.v5"
+HEADER = struct.Struct(">HHIII")
+MAGIC = 0x2131
+HELLO_LENGTH = 32
+
+# remain_time of a simulated cycle in minutes, and the minute each wash_process
+# starts. Simulated cycles run one minute per second.
+CYCLE_MINUTES = 60
+CYCLE_PHASES = ((60, 1), (55, 2), (30, 3), (15, 4), (5, 5))
+
+
+def washer_host(index):
+    """Return the loopback address of the simulated washer with this index."""
+    return "127.1.{}.{}".format(index // 250, index % 250 + 1)
+
+
+def washer_token(index):
+    """Return the token of the simulated washer with this index."""
+    return hashlib.md5("viomi-washer-{}".format(index).encode()).hexdigest()
+
+
+def washer_mac(index):
+    """Return the MAC address of the simulated washer with this index."""
+    return "02:00:00:{:02x}:{:02x}:{:02x}".format(
+        (index >> 16) & 0xff, (index >> 8) & 0xff, index & 0xff)
+
+
+class SimulatedWasher(asyncio.DatagramProtocol):
+    """A viomi.washer.v5 answering miIO requests."""
+
+    def __init__(self, token, did, mac, latency=0.0, loss=0.0, leak_token=False):
+        self.pair(token)
+        self.did = did
+        self.mac = mac
+        self.latency = latency
+        self.loss = loss
+        self.leak_token = leak_token
+        self.started = time.time()
+        self.stats = Counter()
+        self.state = {
+            "program": "goldenwash",
+            "wash_process": 0,
+            "wash_status": 0,
+            "remain_time": 0,
+            "appoint_time": 0,
+            "DryMode": 0,
+        }
+        self.cycle_started = None
+        self.last_id = None
+        self.transport = None
+
+    def pair(self, token):
+        """Switch to another token, as a washer paired again does."""
+        self.token = bytes.fromhex(token)
+        key = hashlib.md5(self.token).digest()
+        self._cipher = Cipher(
+            algorithms.AES(key), modes.CBC(hashlib.md5(key + self.token).digest()))
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if self.loss and random.random() < self.loss:
+            self.stats["dropped"] += 1
+            return
+        if self.latency:
+            asyncio.get_running_loop().call_later(
+                self.latency, self._handle, data, addr)
+        else:
+            self._handle(data, addr)
+
+    def _stamp(self):
+        return int(time.time() - self.started) + 1
+
+    def _handle(self, data, addr):
+        if len(data) < HELLO_LENGTH:
+            self.stats["malformed"] += 1
+            return
+        magic, length, _unknown, _did, _stamp = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            self.stats["malformed"] += 1
+            return
+        if length == HELLO_LENGTH:
+            self.stats["hello"] += 1
+            checksum = self.token if self.leak_token else b"\xff" * 16
+            reply = HEADER.pack(MAGIC, HELLO_LENGTH, 0, self.did, self._stamp()) + checksum
+            self.transport.sendto(reply, addr)
+            return
+
+        payload = data[HELLO_LENGTH:length]
+        checksum = hashlib.md5(data[:16] + self.token + payload).digest()
+        if checksum != data[16:32]:
+            # A real washer silently ignores packets sealed with another token
+            self.stats["bad_checksum"] += 1
+            return
+
+        request = json.loads(self._decrypt(payload).rstrip(b"\x00"))
+        self.stats["requests"] += 1
+        if request["id"] == self.last_id:
+            self.stats["duplicate_id"] += 1
+        self.last_id = request["id"]
+        response = {"id": request["id"]}
+        try:
+            response["result"] = self.dispatch(request["method"], request.get("params", []))
+        except KeyError:
+            response["error"] = {"code": -9999, "message": "method not supported"}
+        self.transport.sendto(self._seal(response), addr)
+
+    def _decrypt(self, payload):
+        decryptor = self._cipher.decryptor()
+        unpadder = padding.PKCS7(128).unpadder()
+        plain = decryptor.update(payload) + decryptor.finalize()
+        return unpadder.update(plain) + unpadder.finalize()
+
+    def _seal(self, response):
+        padder = padding.PKCS7(128).padder()
+        encryptor = self._cipher.encryptor()
+        plain = json.dumps(response).encode() + b"\x00"
+        payload = encryptor.update(padder.update(plain) + padder.finalize()) + encryptor.finalize()
+        header = HEADER.pack(MAGIC, HELLO_LENGTH + len(payload), 0, self.did, self._stamp())
+        return header + hashlib.md5(header + self.token + payload).digest() + payload
+
+    def advance(self):
+        """Move a running cycle forward to the current time."""
+        if self.cycle_started is None:
+            return
+        state = self.state
+        remain = CYCLE_MINUTES - int(time.time() - self.cycle_started)
+        if remain <= 0:
+            state.update(wash_process=7, wash_status=0, remain_time=0)
+            self.cycle_started = None
+            return
+        state["remain_time"] = remain
+        for start, phase in CYCLE_PHASES:
+            if remain <= start:
+                state["wash_process"] = phase
+
+    def dispatch(self, method, params):
+        """Run one miIO method against the washer state."""
+        state = self.state
+        self.advance()
+        if method == "get_prop":
+            return [state[prop] for prop in params]
+        if method == "miIO.info":
+            return {
+                "model": MODEL,
+                "fw_ver": "1.0.0_sim",
+                "hw_ver": "esp32",
+                "mac": self.mac,
+                "token": self.token.hex(),
+                "life": int(time.time() - self.started),
+                "ap": {"ssid": "simulator", "bssid": "02:00:00:00:00:00", "rssi": -40},
+                "netif": {"localIp": "", "mask": "255.255.255.0", "gw": ""},
+            }
+        value = params[0] if params else None
+        if method == "set_wash_program":
+            state["program"] = value
+        elif method == "SetDryMode":
+            state["DryMode"] = int(value)
+        elif method == "set_appoint_time":
+            state.update(appoint_time=int(value), wash_status=1)
+        elif method == "set_wash_action":
+            if int(value) == 1:
+                self.cycle_started = time.time()
+                state.update(wash_status=1, appoint_time=0)
+                self.advance()
+            else:
+                self.cycle_started = None
+                state.update(wash_status=0, wash_process=0, remain_time=0)
+        else:
+            raise KeyError(method)
+        return ["ok"]
+
+
+async def async_start_washers(count, latency=0.0, loss=0.0, leak_token=False):
+    """Start count simulated washers, return them with their transports.
+
+    With leak_token the washers answer hello packets with their token, as
+    washers do before they are paired.
+    """
+    loop = asyncio.get_running_loop()
+    washers = []
+    for index in range(count):
+        protocol = SimulatedWasher(
+            washer_token(index), 0x10000000 + index, washer_mac(index), latency, loss,
+            leak_token)
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda protocol=protocol: protocol, local_addr=(washer_host(index), MIIO_PORT))
+        washers.append((protocol, transport))
+    return washers
+
+
+def serve(count, latency=0.0, loss=0.0, ready=None, stop=None, leak_token=False,
+          report=None):
+    """Run simulated washers until stop is set, for use in a child process.
+
+    The stats of every washer are put on the report queue before returning.
+    """
+
+    async def _serve():
+        washers = await async_start_washers(count, latency, loss, leak_token)
+        if ready is not None:
+            ready.set()
+        while stop is None or not stop.is_set():
+            await asyncio.sleep(0.2)
+        for _, transport in washers:
+            transport.close()
+        if report is not None:
+            report.put([dict(protocol.stats) for protocol, _ in washers])
+
+    asyncio.run(_serve())
+
+
+def main():
+    """Run simulated washers in the foreground."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--washers", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="reply delay in seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="share of dropped packets")
+    parser.add_argument(
+        "--leak-token", action="store_true", help="answer hello packets with the token")
+    args = parser.parse_args()
+    for index in range(args.washers):
+        print(washer_host(index), washer_token(index), washer_mac(index))
+    try:
+        serve(args.washers, args.latency, args.loss, leak_token=args.leak_token)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
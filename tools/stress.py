@@ -0,0 +1,198 @@
+"""Stress one shared washer with concurrent polls, commands and turn_on.
+
+Starts one simulated viomi.washer.v5 in a child process and sets up its
+config entry. The entities of one washer share a single ViomiWasher, so
+all requests below go through that shared object: full polls like the
+fan's, single property reads like a sensor's, control commands, and
+turn_on sequences. Each stage sends them at a fixed rate. For every
+stage the report shows throughput, failed requests, replies skipped for
+a stale message id, retries and latency percentiles per operation.
+Run from the repository root:
+
+    python tools/stress.py --rates 5,10,20,50 --stage-seconds 10
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import queue
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+import loadtest
+import simulator
+
+DEFAULT_MIX = "poll=6,sensor=3,control=2,turn_on=1"
+SENSOR_PROPS = ("wash_status", "remain_time")
+
+
+def parse_mix(value):
+    """Return the operation names and weights of a name=weight list."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def operations(washer, rng):
+    """Return the request of each operation name."""
+    return {
+        "poll": lambda: washer.async_update(max_age=0),
+        "sensor": lambda: washer.async_update((rng.choice(SENSOR_PROPS),), max_age=0),
+        "control": lambda: washer.async_run(
+            washer.control, "SetDryMode", rng.choice((0, 30721))),
+        "turn_on": lambda: washer.async_start_cycle(
+            rng.choice(("goldenwash", "quick")), None, 0),
+    }
+
+
+async def async_stage(washer, rate, seconds, mix, rng):
+    """Send requests at rate per second for seconds, return the measurements."""
+    requests = operations(washer, rng)
+    names = [name for name in mix if name in requests]
+    weights = [mix[name] for name in names]
+    latency = defaultdict(list)
+    failures = Counter()
+    loop = asyncio.get_running_loop()
+
+    async def timed(name):
+        start = time.monotonic()
+        try:
+            result = await requests[name]()
+        except Exception as ex:  # pylint: disable=broad-except
+            failures["{} {}".format(name, type(ex).__name__)] += 1
+            return
+        if result is False:
+            failures["{} rejected".format(name)] += 1
+            return
+        latency[name].append(time.monotonic() - start)
+
+    device_stats = Counter(washer.device.stats)
+    washer_stats = Counter(washer.stats)
+    tasks = []
+    start = loop.time()
+    for index in range(int(rate * seconds)):
+        await asyncio.sleep(max(0.0, start + index / rate - loop.time()))
+        tasks.append(loop.create_task(timed(rng.choices(names, weights)[0])))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+
+    completed = sum(len(samples) for samples in latency.values())
+    device_stats = Counter(washer.device.stats) - device_stats
+    washer_stats = Counter(washer.stats) - washer_stats
+    return {
+        "rate": rate,
+        "sent": len(tasks),
+        "completed": completed,
+        "throughput": round(completed / elapsed, 2),
+        "failed": dict(failures),
+        "stale_replies": device_stats["stale_replies"],
+        "retries": device_stats["retries"],
+        "handshakes": device_stats["handshakes"],
+        "hedge_sent": washer_stats["hedge_sent"],
+        "hedge_won": washer_stats["hedge_won"],
+        "reads_coalesced": washer_stats["reads_coalesced"],
+        "latency_ms": {
+            name: {
+                "p{}".format(point): round(value * 1000, 1)
+                for point, value in loadtest.percentiles(samples).items()
+            }
+            for name, samples in latency.items()
+        },
+    }
+
+
+async def async_run(args):
+    """Set up one washer and run every stage against it."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant import core, loader  # noqa: F401  core first, loader needs it
+    from pytest_homeassistant_custom_component.common import (
+        MockConfigEntry,
+        async_test_home_assistant,
+    )
+
+    loadtest.use_repo_components()
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+
+    async with async_test_home_assistant() as hass:
+        hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+        entry = MockConfigEntry(
+            domain=loadtest.DOMAIN,
+            title="washer 0",
+            unique_id=simulator.washer_mac(0),
+            options=loadtest.entry_options(0),
+        )
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        washer = hass.data[loadtest.DOMAIN][simulator.washer_host(0)]
+
+        stages = []
+        for rate in args.rates:
+            stages.append(await async_stage(washer, rate, args.stage_seconds, mix, rng))
+        await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+        await hass.async_stop(force=True)
+    return stages
+
+
+def main():
+    """Run the stress test and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rates", type=lambda value: [float(rate) for rate in value.split(",")],
+        default=[5, 10, 20, 50], help="requests per second of each stage")
+    parser.add_argument("--stage-seconds", type=float, default=10)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation=weight list")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated reply delay")
+    parser.add_argument("--loss", type=float, default=0.0, help="share of dropped packets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    stop = context.Event()
+    report = context.Queue()
+    washers = context.Process(
+        target=simulator.serve,
+        args=(1, args.latency, args.loss),
+        kwargs={"ready": ready, "stop": stop, "report": report},
+        daemon=True,
+    )
+    washers.start()
+    ready.wait()
+    try:
+        stages = asyncio.run(async_run(args))
+    finally:
+        stop.set()
+        try:
+            washer_stats = report.get(timeout=5)[0]
+        except queue.Empty:
+            washer_stats = {}
+        washers.join()
+
+    if args.json:
+        print(json.dumps({"stages": stages, "simulator": washer_stats}, indent=2))
+    else:
+        for stage in stages:
+            print("rate {rate:g}/s: {completed}/{sent} completed, {throughput}/s".format(
+                **stage))
+            for key in ("failed", "stale_replies", "retries", "handshakes",
+                        "hedge_sent", "hedge_won", "reads_coalesced"):
+                print("  {:18} {}".format(key, stage[key]))
+            for name, points in sorted(stage["latency_ms"].items()):
+                print("  {:18} {}".format(name + " ms", points))
+        print("simulator          ", washer_stats)
+
+    if washer_stats.get("duplicate_id"):
+        sys.exit("The washer saw {} requests reusing the previous message id".format(
+            washer_stats["duplicate_id"]))
+
+
+if __name__ == "__main__":
+    main()